@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from latex_manager import (
+    ESCAPE_CACHE_MAX_CHARS,
+    LATEX_ESCAPE_MAP,
+    LATEX_SECTION_IDENTIFIER,
+    _escape_latex_text,
+    escape_latex_text,
+)
+
+
+def legacy_escape_latex(text: str) -> str:
+    # the per-character dict lookup escaper this benchmark is compared against
+    parts = text.split(LATEX_SECTION_IDENTIFIER)
+    if len(parts) % 2 == 0:
+        raise ValueError("Mismatched LaTeX section identifiers.")
+    for i in range(0, len(parts), 2):
+        parts[i] = "".join(LATEX_ESCAPE_MAP.get(char, char) for char in parts[i])
+    return "".join(parts)
+
+
+def nmap_dump(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        host = f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        port = rng.choice([21, 22, 80, 443, 445, 3389, 8080])
+        line = rng.choice(
+            [
+                f"Nmap scan report for {host}",
+                f"{port}/tcp open  http    Apache httpd 2.4.41 ((Ubuntu))",
+                f"|_http-title: Site doesn't have a title (text/html; charset=UTF-8).",
+                f"| smb-security-mode: account_used=guest; challenge_response=supported",
+                f"|   {host}:{port} ~ 100% $HOME/.ssh/id_rsa #{rng.randint(0, 99)} {{x^2}}",
+                f"***\\code{{curl -k https://{host}:{port}/}}***",
+            ]
+        )
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def time_it(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark LaTeX escaping of large pasted tool output."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 1_000_000, 4_000_000],
+        help="Input sizes in characters.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for size in args.sizes:
+        text = nmap_dump(size)
+        if legacy_escape_latex(text) != _escape_latex_text(text):
+            raise SystemExit(f"Output mismatch for {size} characters")
+        legacy = time_it(legacy_escape_latex, text, args.repeat)
+        table = time_it(_escape_latex_text, text, args.repeat)
+        result = {
+            "benchmark": "escape_latex",
+            "chars": len(text),
+            "legacy_s": round(legacy, 6),
+            "table_s": round(table, 6),
+            "speedup": round(legacy / table, 1),
+        }
+        # larger inputs aren't memoized, escape_latex_text would time the table
+        if len(text) <= ESCAPE_CACHE_MAX_CHARS:
+            escape_latex_text(text)
+            memoized = time_it(escape_latex_text, text, args.repeat)
+            result["memoized_s"] = round(memoized, 6)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
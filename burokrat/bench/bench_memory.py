@@ -0,0 +1,104 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from util import *
+from engagement import generate_engagement
+
+
+class LegacyMachineScope:
+    # the dict-based model this benchmark is compared against
+    def __init__(self, data: dict):
+        self.ip = data.get("ip", "")
+        self.name = data.get("name", "")
+        self.services = data.get("services", [])
+
+
+@dataclass
+class LegacyFinding:
+    id: str
+    title: str
+    risk: int
+    impact: int
+    likelihood: int
+    cvss_vector: dict[str, str]
+    scope: list[LegacyMachineScope]
+    description: str
+    business_impact: str
+    exploit_details: str | list[str]
+    exploit_details_raw: bool
+    remediation: str
+    references: list[dict[str, str]]
+    mitre_techniques: list[str]
+
+    def __init__(self, id: str, data: dict):
+        self.id = id
+        self.title = data.get("title", "")
+        self.risk = min(data.get("risk", 1) - 1, 3)
+        self.impact = min(data.get("impact", 1) - 1, 3)
+        self.likelihood = min(data.get("likelihood", 1) - 1, 3)
+        self.cvss_vector = data.get("cvss_vector", {})
+        self.scope = [LegacyMachineScope(svc) for svc in data.get("scope", [])]
+        self.description = data.get("description", "")
+        self.business_impact = data.get("business_impact", "")
+        self.exploit_details = data.get("exploit_details", [""])
+        self.exploit_details_raw = isinstance(self.exploit_details, str)
+        self.remediation = data.get("remediation", "")
+        self.references = data.get("references", [])
+        self.mitre_techniques = data.get("mitre_techniques", [])
+
+
+def measure(build, corpus: dict[str, str]) -> int:
+    # bytes still allocated after building every finding from freshly parsed
+    # JSON and dropping the parsed dicts, as when a folder is loaded
+    gc.collect()
+    tracemalloc.start()
+    findings = [build(id, json.loads(text)) for id, text in corpus.items()]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del findings
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the per-finding memory footprint of the findings model."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 10_000],
+        help="Number of findings per engagement.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for count in args.sizes:
+        corpus = {
+            id: json.dumps(data)
+            for id, data in generate_engagement(count, args.seed).items()
+        }
+        legacy = measure(LegacyFinding, corpus)
+        compact = measure(Finding.build_from_json, corpus)
+        print(
+            json.dumps(
+                {
+                    "benchmark": "finding_memory",
+                    "findings": count,
+                    "legacy_bytes_per_finding": legacy // count,
+                    "compact_bytes_per_finding": compact // count,
+                    "saving": round(1 - compact / legacy, 3),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from util import *
+from latex_manager import LatexManager, _memoized_escape_latex_text
+from engagement import generate_engagement, write_engagement
+
+
+def time_it(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # measure cold escaping, not the memoized fields from the last run
+        _memoized_escape_latex_text.cache_clear()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def text_fields(findings: list[Finding]) -> list[str]:
+    fields = []
+    for finding in findings:
+        fields += [
+            finding.title,
+            finding.description,
+            finding.business_impact,
+            finding.remediation,
+        ]
+        if isinstance(finding.exploit_details, list):
+            fields += finding.exploit_details
+    return fields
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_latexmk(
+    latex_manager: LatexManager, finding: Finding, folder: str
+) -> float | None:
+    latex = latex_manager.convert_finding_to_latex("1.2.3", finding)
+    start = time.perf_counter()
+    success, error = latex_manager.build_tex_pdf(
+        latex_manager.report_tex_file,
+        {latex_manager.finding_tex_file: latex},
+        os.path.join(folder, f"{finding.id}.pdf"),
+        use_cache=False,
+    )
+    if not success:
+        print(f"Warning: latexmk benchmark failed: {error}", file=sys.stderr)
+        return None
+    return time.perf_counter() - start
+
+
+def bench_corpus(
+    latex_manager: LatexManager, count: int, seed: int, repeat: int, latexmk: bool
+) -> list[dict]:
+    corpus = generate_engagement(count, seed)
+    findings = [Finding.build_from_json(id, data) for id, data in corpus.items()]
+    fields = text_fields(findings)
+    results = {
+        "from_json": time_it(
+            lambda: [Finding.build_from_json(id, data) for id, data in corpus.items()],
+            repeat,
+        ),
+        "to_json": time_it(lambda: [finding.to_json() for finding in findings], repeat),
+        "escape_latex": time_it(
+            lambda: [latex_manager.escape_latex(text) for text in fields], repeat
+        ),
+        "convert_finding_to_latex": time_it(
+            lambda: [
+                latex_manager.convert_finding_to_latex("1.2.3", finding)
+                for finding in findings
+            ],
+            repeat,
+        ),
+        "generate_report_latex": time_it(
+            lambda: latex_manager.generate_report_latex(findings), repeat
+        ),
+    }
+    with tempfile.TemporaryDirectory(prefix="burokrat-bench-") as folder:
+        write_engagement(folder, corpus)
+        results["load_directory"] = time_it(
+            lambda: [load_finding_file(path) for path in iter_finding_files(folder)],
+            repeat,
+        )
+        latexmk_seconds = (
+            run_latexmk(latex_manager, findings[0], folder) if latexmk else None
+        )
+    rows = [
+        {
+            "benchmark": name,
+            "findings": count,
+            "seconds": round(seconds, 6),
+            "per_finding_us": round(seconds / count * 1e6, 2),
+        }
+        for name, seconds in results.items()
+    ]
+    if latexmk_seconds is not None:
+        # a single build, so it is not divided by the corpus size
+        rows.append(
+            {
+                "benchmark": "latexmk_single_finding",
+                "findings": count,
+                "seconds": round(latexmk_seconds, 6),
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the findings pipeline on synthetic engagements."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 10_000],
+        help="Number of findings per engagement.",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latexmk",
+        action="store_true",
+        help="Also time an uncached single finding PDF build.",
+    )
+    parser.add_argument(
+        "-o", "--output", help="Append results as JSON lines to this file."
+    )
+    args = parser.parse_args()
+    latex_manager = LatexManager()
+    run = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+    }
+    output = open(args.output, "a") if args.output else None
+    for count in args.sizes:
+        for result in bench_corpus(
+            latex_manager, count, args.seed, args.repeat, args.latexmk
+        ):
+            line = json.dumps({**run, **result})
+            print(line)
+            if output:
+                output.write(line + "\n")
+    if output:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
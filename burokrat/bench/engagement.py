@@ -0,0 +1,149 @@
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from util import *
+from mitre_index import get_mitre_index
+
+WORDS = (
+    "the server exposes an unauthenticated endpoint that allows attackers to read "
+    "arbitrary files from the host including configuration data credentials and "
+    "session tokens which can be reused against other systems in the domain"
+).split()
+SERVICES = [
+    ("SSH", "TCP/22"),
+    ("HTTP", "TCP/80"),
+    ("HTTPS", "TCP/443"),
+    ("SMB", "TCP/445"),
+    ("RDP", "TCP/3389"),
+    ("LDAP", "TCP/389"),
+    ("Kerberos", "TCP/88"),
+    ("MSSQL", "TCP/1433"),
+    ("SNMP", "UDP/161"),
+]
+SPECIAL_TOKENS = [
+    "50%",
+    "C:\\Windows\\Temp",
+    "$USER",
+    "#1",
+    "a_b",
+    "{x}",
+    "~/.ssh",
+    "R&D",
+]
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    if rng.random() < 0.5:
+        text += " " + rng.choice(SPECIAL_TOKENS)
+    return text.capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(sentence(rng, rng.randint(8, 20)) for _ in range(sentences))
+
+
+def random_host(rng: random.Random) -> str:
+    return f"10.{rng.randint(0, 20)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def exploit_step(rng: random.Random, host: str) -> str:
+    step = paragraph(rng, rng.randint(1, 3))
+    if rng.random() < 0.4:
+        # raw LaTeX passes through the escaper untouched
+        step += f"\n***\\code{{nmap -sC -sV -p- {host} -oA scans/{host}}}***"
+    if rng.random() < 0.2:
+        step += "\n" + "\n".join(
+            f"{port}/tcp open {name.lower()}" for name, port in rng.sample(SERVICES, 4)
+        )
+    return step
+
+
+def generate_finding_json(
+    rng: random.Random, mitre_ids: list[str], max_hosts: int = 40
+) -> dict:
+    scope = []
+    for _ in range(rng.randint(1, max_hosts)):
+        host = random_host(rng)
+        scope.append(
+            {
+                "ip": host,
+                "name": (
+                    f"host{rng.randint(1, 999)}.corp.local"
+                    if rng.random() < 0.7
+                    else ""
+                ),
+                "services": [
+                    {"name": name, "port": port}
+                    for name, port in rng.sample(SERVICES, rng.randint(0, 5))
+                ],
+            }
+        )
+    host = scope[0]["ip"]
+    if rng.random() < 0.1:
+        exploit_details = (
+            "\\begin{enumerate}\n"
+            + "\n".join(
+                f"\\item {exploit_step(rng, host)}" for _ in range(rng.randint(3, 10))
+            )
+            + "\n\\end{enumerate}"
+        )
+    else:
+        exploit_details = [exploit_step(rng, host) for _ in range(rng.randint(3, 30))]
+    cvss_vector = {
+        part: rng.choice(list(details["values"]))
+        for part, details in CVSS_SECTIONS.items()
+    }
+    if rng.random() < 0.1:
+        cvss_vector["AV"] = ""
+    return {
+        "title": sentence(rng, rng.randint(3, 8)).rstrip("."),
+        "risk": rng.randint(1, 4),
+        "impact": rng.randint(1, 4),
+        "likelihood": rng.randint(1, 4),
+        "cvss_vector": cvss_vector,
+        "scope": scope,
+        "description": "\n".join(paragraph(rng, 4) for _ in range(rng.randint(1, 3))),
+        "business_impact": paragraph(rng, rng.randint(2, 5)),
+        "exploit_details": exploit_details,
+        "remediation": paragraph(rng, rng.randint(2, 6)),
+        "references": [
+            {
+                "name": sentence(rng, 4),
+                "url": f"https://example.com/advisory/{rng.randint(1000, 9999)}#section_2",
+            }
+            for _ in range(rng.randint(0, 5))
+        ],
+        "mitre_techniques": rng.sample(mitre_ids, rng.randint(0, 6)),
+    }
+
+
+def generate_engagement(count: int, seed: int = 0) -> dict[str, dict]:
+    # finding id -> finding json, deterministic for a given count and seed
+    rng = random.Random(seed)
+    mitre_ids = get_mitre_index(resolve_path("mitre_techniques.json")).ids
+    return {
+        f"BENCH-{i:05d}": generate_finding_json(rng, mitre_ids)
+        for i in range(1, count + 1)
+    }
+
+
+def write_engagement(folder: str, findings: dict[str, dict]):
+    os.makedirs(folder, exist_ok=True)
+    for finding_id, data in findings.items():
+        write_json_atomic(os.path.join(folder, f"{finding_id}.json"), data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic engagement of findings to a folder."
+    )
+    parser.add_argument("output_folder", help="Folder to write JSON findings to.")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_engagement(args.output_folder, generate_engagement(args.count, args.seed))
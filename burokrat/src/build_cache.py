@@ -0,0 +1,150 @@
+import hashlib
+import os
+import re
+import shutil
+import uuid
+
+EVIDENCE_PATTERN = re.compile(r"\\evidence\{([^{}]+)\}")
+IMAGE_EXTENSIONS = ["", ".png", ".jpg", ".jpeg", ".pdf"]
+TEMPLATE_EXTENSIONS = (".tex", ".sty", ".cls")
+# written into the template tree by the scripts in src/ and only read by the
+# full report; left out of the template digest so regenerating them keeps
+# the cached previews, the preamble format and the workspaces
+GENERATED_TEX_FILES = (
+    "sections/overview_stats.tex",
+    "sections/affected_assets.tex",
+)
+
+
+def resolve_evidence_image(name: str, images_dir: str) -> str:
+    # the file \evidence{name} refers to, or "" if there is none
+    for ext in IMAGE_EXTENSIONS:
+        path = os.path.join(images_dir, name.strip() + ext)
+        if os.path.isfile(path):
+            return path
+    return ""
+
+
+def copy_file_atomic(src: str, dst: str):
+    # copy next to the destination first so readers never see a partial file;
+    # the name is unique since threads of one process may copy to the same dst
+    tmp_dst = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        shutil.copyfile(src, tmp_dst)
+        os.replace(tmp_dst, dst)
+    except OSError:
+        if os.path.exists(tmp_dst):
+            os.remove(tmp_dst)
+        raise
+
+
+class BuildCache:
+    cache_dir: str
+    max_entries: int
+
+    def __init__(self, cache_dir: str, max_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        # path -> (mtime_ns, size, digest) so unchanged files are not re-read
+        self._file_digests: dict[str, tuple[int, int, str]] = {}
+
+    def file_digest(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._file_digests.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        self._file_digests[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+    def template_files(
+        self, latex_dir: str, exclude: list[str] | None = None
+    ) -> list[str]:
+        excluded = {os.path.abspath(x) for x in exclude or []}
+        files = []
+        for root, _, filenames in os.walk(latex_dir):
+            for filename in filenames:
+                path = os.path.abspath(os.path.join(root, filename))
+                if not filename.endswith(TEMPLATE_EXTENSIONS) or path in excluded:
+                    continue
+                if os.path.relpath(path, latex_dir) in GENERATED_TEX_FILES:
+                    continue
+                files.append(path)
+        return sorted(files)
+
+    def template_digest(self, latex_dir: str, exclude: list[str] | None = None) -> str:
+        return self.files_digest(latex_dir, self.template_files(latex_dir, exclude))
+
+    def files_digest(self, latex_dir: str, paths: list[str]) -> str:
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(os.path.relpath(path, latex_dir).encode("utf-8"))
+            digest.update(self.file_digest(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def find_evidence_images(self, latex: str, images_dir: str) -> list[str]:
+        images = []
+        for name in sorted(set(EVIDENCE_PATTERN.findall(latex))):
+            path = resolve_evidence_image(name, images_dir)
+            if path:
+                images.append(path)
+        return images
+
+    def key(
+        self,
+        latex: str,
+        latex_dir: str,
+        images_dir: str,
+        exclude: list[str] | None = None,
+    ) -> str:
+        digest = hashlib.sha256()
+        digest.update(latex.encode("utf-8"))
+        digest.update(self.template_digest(latex_dir, exclude).encode("ascii"))
+        for path in self.find_evidence_images(latex, images_dir):
+            digest.update(os.path.basename(path).encode("utf-8"))
+            digest.update(self.file_digest(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def get(self, key: str, output_file: str) -> bool:
+        entry = self._entry_path(key)
+        try:
+            copy_file_atomic(entry, output_file)
+        except FileNotFoundError:
+            return False
+        # refresh mtime so pruning evicts the least recently used entries
+        os.utime(entry)
+        return True
+
+    def put(self, key: str, pdf_file: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        copy_file_atomic(pdf_file, self._entry_path(key))
+        self.prune()
+
+    def prune(self):
+        entries = [
+            os.path.join(self.cache_dir, x)
+            for x in os.listdir(self.cache_dir)
+            if x.endswith(".pdf")
+        ]
+        if len(entries) <= self.max_entries:
+            return
+
+        def last_used(path: str) -> float:
+            # another build may have evicted it since listdir
+            try:
+                return os.path.getmtime(path)
+            except FileNotFoundError:
+                return 0.0
+
+        entries.sort(key=last_used, reverse=True)
+        for entry in entries[self.max_entries :]:
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
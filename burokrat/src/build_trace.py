@@ -0,0 +1,284 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+LATEXMK_RUN_PATTERN = re.compile(r"Run number (\d+) of rule '([^']+)'")
+
+_current = threading.local()
+
+
+class BuildTrace:
+    # Timing record of one build. Stages are summed by name, so a stage that
+    # runs many times (e.g. escape) reports its total and call count. Stages
+    # nest: latex_generation includes the escape time spent inside it.
+    def __init__(self, kind: str, attributes: dict):
+        self.build_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.status = "running"
+        self.error = ""
+        self.stages: dict[str, list] = {}
+        self.passes: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def to_json(self) -> dict:
+        return {
+            "build_id": self.build_id,
+            "kind": self.kind,
+            "started_at": round(self.started_at, 3),
+            "duration_s": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            **self.attributes,
+            "stages": {
+                stage: {"seconds": round(seconds, 6), "count": count}
+                for stage, (seconds, count) in self.stages.items()
+            },
+            "latexmk_passes": self.passes,
+        }
+
+
+class Span:
+    def __init__(self, trace: BuildTrace, stage: str):
+        self.trace = trace
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.stage, time.perf_counter() - self.start)
+
+
+class NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NO_SPAN = NoSpan()
+
+
+def current_trace() -> BuildTrace | None:
+    return getattr(_current, "trace", None)
+
+
+def span(stage: str) -> Span | NoSpan:
+    # time a stage of the build active on this thread, if there is one
+    trace = getattr(_current, "trace", None)
+    return NO_SPAN if trace is None else Span(trace, stage)
+
+
+class activate:
+    # make a trace the active one for this thread, e.g. inside a pool worker
+    def __init__(self, trace: BuildTrace):
+        self.trace = trace
+        self.previous = None
+
+    def __enter__(self) -> BuildTrace:
+        self.previous = current_trace()
+        _current.trace = self.trace
+        return self.trace
+
+    def __exit__(self, *exc):
+        _current.trace = self.previous
+
+
+class LatexmkPassTimer:
+    # latexmk prints "Run number N of rule 'pdflatex'" before every pass; the
+    # time between two markers (or the end of the run) is that pass
+    def __init__(self):
+        self.passes: list[dict] = []
+        self._current: dict | None = None
+        self._start = 0.0
+
+    def _close(self, now: float):
+        if self._current is not None:
+            self._current["seconds"] = round(now - self._start, 6)
+            self.passes.append(self._current)
+            self._current = None
+
+    def feed(self, line: str):
+        match = LATEXMK_RUN_PATTERN.search(line)
+        if match:
+            now = time.perf_counter()
+            self._close(now)
+            self._current = {"rule": match.group(2), "run": int(match.group(1))}
+            self._start = now
+
+    def finish(self) -> list[dict]:
+        self._close(time.perf_counter())
+        return self.passes
+
+
+def prometheus_labels(labels: dict[str, str]) -> str:
+    escaped = {
+        key: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for key, value in labels.items()
+    }
+    return ",".join(f'{key}="{value}"' for key, value in escaped.items())
+
+
+def process_name() -> str:
+    # e.g. "gui-1234" (streamlit puts the script in argv[0]) or "export_pdfs-99"
+    script = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    script = re.sub(r"[^\w.]", "", script) or "python"
+    return f"{script}-{os.getpid()}"
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class BuildTracer:
+    # Appends one JSON line per finished build to log_file and, if
+    # metrics_file is set, rewrites a Prometheus text-format file with
+    # counters for this process (for node_exporter's textfile collector).
+    # The GUI and the command line tools each count their own builds, so
+    # every process writes <metrics_file stem>.<script>-<pid>.prom with a
+    # matching process label, and the files of exited processes are removed.
+    def __init__(self, log_file: str, metrics_file: str = ""):
+        self.log_file = log_file
+        self.process = process_name()
+        self.metrics_file = ""
+        if metrics_file:
+            base, ext = os.path.splitext(metrics_file)
+            self.metrics_file = f"{base}.{self.process}{ext or '.prom'}"
+            self._remove_stale_metrics(base, ext or ".prom")
+        self._lock = threading.Lock()
+        self.builds: dict[tuple[str, str], list] = {}
+        self.stages: dict[str, list] = {}
+        self.passes: dict[str, list] = {}
+
+    def start(self, kind: str, **attributes) -> BuildTrace:
+        return BuildTrace(kind, attributes)
+
+    def finish(self, trace: BuildTrace, status: str, error: str = ""):
+        trace.duration = time.perf_counter() - trace.start
+        trace.status = status
+        trace.error = error
+        with self._lock:
+            build = self.builds.setdefault((trace.kind, status), [0, 0.0])
+            build[0] += 1
+            build[1] += trace.duration
+            for stage, (seconds, count) in trace.stages.items():
+                totals = self.stages.setdefault(stage, [0.0, 0])
+                totals[0] += seconds
+                totals[1] += count
+            for latexmk_pass in trace.passes:
+                totals = self.passes.setdefault(latexmk_pass["rule"], [0.0, 0])
+                totals[0] += latexmk_pass.get("seconds", 0.0)
+                totals[1] += 1
+            if self.log_file:
+                try:
+                    os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+                    with open(self.log_file, "a") as file:
+                        file.write(json.dumps(trace.to_json()) + "\n")
+                except OSError as e:
+                    print(f"Warning: failed to write build trace: {e}")
+            if self.metrics_file:
+                self._write_metrics()
+
+    @staticmethod
+    def _remove_stale_metrics(base: str, ext: str):
+        folder = os.path.dirname(base) or "."
+        pattern = re.compile(
+            re.escape(os.path.basename(base)) + r"\.[^/]+-(\d+)" + re.escape(ext) + "$"
+        )
+        try:
+            filenames = os.listdir(folder)
+        except FileNotFoundError:
+            return
+        for filename in filenames:
+            match = pattern.match(filename)
+            if match and not pid_alive(int(match.group(1))):
+                try:
+                    os.remove(os.path.join(folder, filename))
+                except FileNotFoundError:
+                    pass
+
+    def metrics_text(self) -> str:
+        lines = [
+            "# HELP burokrat_builds_total Finished LaTeX builds.",
+            "# TYPE burokrat_builds_total counter",
+        ]
+        for (kind, status), (count, _) in sorted(self.builds.items()):
+            labels = prometheus_labels(
+                {"process": self.process, "kind": kind, "status": status}
+            )
+            lines.append(f"burokrat_builds_total{{{labels}}} {count}")
+        lines += [
+            "# HELP burokrat_build_seconds_total Wall time spent in builds.",
+            "# TYPE burokrat_build_seconds_total counter",
+        ]
+        for (kind, status), (_, seconds) in sorted(self.builds.items()):
+            labels = prometheus_labels(
+                {"process": self.process, "kind": kind, "status": status}
+            )
+            lines.append(f"burokrat_build_seconds_total{{{labels}}} {seconds:.6f}")
+        lines += [
+            "# HELP burokrat_build_stage_seconds_total Time spent per build stage.",
+            "# TYPE burokrat_build_stage_seconds_total counter",
+        ]
+        for stage, (seconds, _) in sorted(self.stages.items()):
+            labels = prometheus_labels({"process": self.process, "stage": stage})
+            lines.append(
+                f"burokrat_build_stage_seconds_total{{{labels}}} {seconds:.6f}"
+            )
+        lines += [
+            "# HELP burokrat_build_stage_runs_total Times each build stage ran.",
+            "# TYPE burokrat_build_stage_runs_total counter",
+        ]
+        for stage, (_, count) in sorted(self.stages.items()):
+            labels = prometheus_labels({"process": self.process, "stage": stage})
+            lines.append(f"burokrat_build_stage_runs_total{{{labels}}} {count}")
+        lines += [
+            "# HELP burokrat_latexmk_pass_seconds_total Time spent per latexmk rule.",
+            "# TYPE burokrat_latexmk_pass_seconds_total counter",
+        ]
+        for rule, (seconds, _) in sorted(self.passes.items()):
+            labels = prometheus_labels({"process": self.process, "rule": rule})
+            lines.append(
+                f"burokrat_latexmk_pass_seconds_total{{{labels}}} {seconds:.6f}"
+            )
+        lines += [
+            "# HELP burokrat_latexmk_passes_total Passes run per latexmk rule.",
+            "# TYPE burokrat_latexmk_passes_total counter",
+        ]
+        for rule, (_, count) in sorted(self.passes.items()):
+            labels = prometheus_labels({"process": self.process, "rule": rule})
+            lines.append(f"burokrat_latexmk_passes_total{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _write_metrics(self):
+        # node_exporter may read at any time, so replace the file atomically
+        tmp_file = f"{self.metrics_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w") as file:
+                file.write(self.metrics_text())
+            os.replace(tmp_file, self.metrics_file)
+        except OSError as e:
+            print(f"Warning: failed to write build metrics: {e}")
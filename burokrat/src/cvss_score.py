@@ -0,0 +1,23 @@
+from functools import lru_cache
+from cvss import CVSS4
+from cvss.exceptions import CVSSError
+
+CVSS_PREFIX = "CVSS:4.0/"
+
+
+def format_cvss_vector(cvss_vector: dict[str, str]) -> str:
+    return (
+        (CVSS_PREFIX + "/".join(f"{key}:{value}" for key, value in cvss_vector.items()))
+        if all(cvss_vector.values())
+        else "N/A"
+    )
+
+
+@lru_cache(maxsize=4096)
+def cvss_base_score(cvss_vector: str) -> float:
+    # shared by the GUI and report builds; the same handful of vectors is
+    # scored over and over, so parsing once per distinct vector is enough
+    try:
+        return CVSS4(cvss_vector).scores()[0]
+    except CVSSError as e:
+        raise ValueError(f"Invalid CVSS 4.0 vector {cvss_vector!r}: {e}") from e
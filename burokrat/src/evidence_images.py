@@ -0,0 +1,180 @@
+import hashlib
+import math
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+from PIL import Image
+from build_cache import BuildCache, copy_file_atomic, resolve_evidence_image
+from build_trace import span
+
+EVIDENCE_WIDTH_PATTERN = re.compile(r"\\evidence\{([^{}]+)\}\{([^{}]+)\}")
+LENGTH_PATTERN = re.compile(
+    r"^\s*(\d*\.?\d*)\s*(\\textwidth|\\linewidth|\\columnwidth|cm|mm|in|pt|bp)\s*$"
+)
+INCHES_PER_UNIT = {
+    "cm": 1 / 2.54,
+    "mm": 1 / 25.4,
+    "in": 1.0,
+    "pt": 1 / 72.27,
+    "bp": 1 / 72,
+}
+# Pillow format per extension; anything else (e.g. PDF evidence) is used as is
+RASTER_FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG"}
+# the workspace directory searched before ../images/, see \graphicspath
+EVIDENCE_DIR = "evidence"
+
+
+def evidence_width_inches(width: str, text_width: float) -> float:
+    # printed width of an \evidence image; unknown lengths count as full width
+    match = LENGTH_PATTERN.match(width)
+    if not match:
+        return text_width
+    factor = float(match.group(1)) if match.group(1).strip(".") else 1.0
+    unit = match.group(2)
+    if unit.startswith("\\"):
+        return factor * text_width
+    return factor * INCHES_PER_UNIT[unit]
+
+
+class EvidenceImages:
+    # Downscales evidence screenshots to the resolution they are printed at
+    # and recompresses them before a build. Results are cached by source
+    # digest and target size in cache_dir and linked into the workspace's
+    # evidence/ folder, which \graphicspath searches before ../images/, so
+    # the LaTeX and the originals stay untouched.
+    def __init__(
+        self,
+        cache_dir: str,
+        images_dir: str,
+        build_cache: BuildCache,
+        dpi: int = 200,
+        text_width: float = 7.5,
+        jpeg_quality: int = 85,
+        workers: int = 2,
+        max_entries: int = 512,
+    ):
+        self.cache_dir = cache_dir
+        self.images_dir = images_dir
+        self.build_cache = build_cache
+        self.dpi = dpi
+        self.text_width = text_width
+        self.jpeg_quality = jpeg_quality
+        self.workers = workers
+        self.max_entries = max_entries
+
+    @property
+    def settings(self) -> str:
+        # part of the PDF cache key, so changing them rebuilds the previews
+        return f"evidence:{self.dpi}:{self.text_width}:{self.jpeg_quality}"
+
+    def references(self, texts: Iterable[str]) -> dict[str, float]:
+        # evidence name -> widest use in inches
+        widths: dict[str, float] = {}
+        for text in texts:
+            for name, width in EVIDENCE_WIDTH_PATTERN.findall(text):
+                inches = evidence_width_inches(width, self.text_width)
+                widths[name.strip()] = max(widths.get(name.strip(), 0.0), inches)
+        return widths
+
+    def process(self, path: str, inches: float) -> str:
+        # path of the image to build with: a cached copy no wider than needed,
+        # or the original if it is not a raster image or can't be read
+        ext = os.path.splitext(path)[1].lower()
+        image_format = RASTER_FORMATS.get(ext)
+        if image_format is None:
+            return path
+        target_width = math.ceil(inches * self.dpi)
+        key = hashlib.sha256(
+            f"{self.build_cache.file_digest(path)}:{target_width}:"
+            f"{self.jpeg_quality}".encode("ascii")
+        ).hexdigest()
+        output = os.path.join(self.cache_dir, key + ext)
+        if os.path.exists(output):
+            # refresh mtime so pruning evicts the least recently used entries
+            os.utime(output)
+            return output
+        tmp_output = f"{output}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with Image.open(path) as image:
+                if image.width > target_width:
+                    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+                        image = image.convert(
+                            "RGBA" if image_format == "PNG" else "RGB"
+                        )
+                    height = max(1, round(image.height * target_width / image.width))
+                    image = image.resize(
+                        (target_width, height), Image.Resampling.LANCZOS
+                    )
+                options = {"dpi": (self.dpi, self.dpi)}
+                if image_format == "PNG":
+                    options["optimize"] = True
+                else:
+                    if image.mode not in ("RGB", "L", "CMYK"):
+                        image = image.convert("RGB")
+                    options.update(quality=self.jpeg_quality, optimize=True)
+                image.save(tmp_output, image_format, **options)
+        except (OSError, ValueError) as e:
+            print(f"Warning: failed to process evidence image {path}: {e}")
+            if os.path.exists(tmp_output):
+                os.remove(tmp_output)
+            return path
+        # a small screenshot may not get any smaller; keep the original bytes
+        if os.path.getsize(tmp_output) >= os.path.getsize(path):
+            os.remove(tmp_output)
+            copy_file_atomic(path, output)
+        else:
+            os.replace(tmp_output, output)
+        return output
+
+    def prepare(self, root: str, texts: Iterable[str]):
+        # link the processed copy of every image referenced in texts into
+        # <root>/evidence, replacing the links of the previous build
+        evidence_dir = os.path.join(root, EVIDENCE_DIR)
+        shutil.rmtree(evidence_dir, ignore_errors=True)
+        jobs = []
+        for name, inches in self.references(texts).items():
+            path = resolve_evidence_image(name, self.images_dir)
+            if path:
+                jobs.append((path, inches))
+        if not jobs:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with span("evidence_images"):
+            if len(jobs) == 1:
+                processed = [self.process(*jobs[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    processed = list(pool.map(lambda job: self.process(*job), jobs))
+            for (path, _), image in zip(jobs, processed):
+                link = os.path.join(
+                    evidence_dir, os.path.relpath(path, self.images_dir)
+                )
+                os.makedirs(os.path.dirname(link), exist_ok=True)
+                os.symlink(os.path.abspath(image), link)
+        self.prune()
+
+    def prune(self):
+        entries = [
+            os.path.join(self.cache_dir, x)
+            for x in os.listdir(self.cache_dir)
+            if not x.endswith(".tmp")
+        ]
+        if len(entries) <= self.max_entries:
+            return
+
+        def last_used(path: str) -> float:
+            # another build may have evicted it since listdir
+            try:
+                return os.path.getmtime(path)
+            except FileNotFoundError:
+                return 0.0
+
+        entries.sort(key=last_used, reverse=True)
+        for entry in entries[self.max_entries :]:
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
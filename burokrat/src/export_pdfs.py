@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import time
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from util import *
+from latex_manager import LatexManager
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ExportResult:
+    finding_id: str
+    status: str
+    seconds: float
+    error: str
+
+    def __init__(
+        self, finding_id: str, status: str, seconds: float = 0.0, error: str = ""
+    ):
+        self.finding_id = finding_id
+        self.status = status
+        self.seconds = seconds
+        self.error = error
+
+
+class FindingPdfExporter:
+    # Builds one PDF per finding into output_folder, like the GUI's Generate
+    # button. manifest.json maps every finding id to the build cache key of
+    # its last export, which covers the finding, the templates and its
+    # evidence images, so a re-run only rebuilds findings whose key changed.
+    def __init__(self, latex_manager: LatexManager, output_folder: str, jobs: int):
+        self.latex_manager = latex_manager
+        self.output_folder = output_folder
+        self.jobs = jobs
+        # must be set before the first build starts the worker pool
+        self.latex_manager.build_workers = jobs
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.output_folder, MANIFEST_FILE)
+
+    def load_manifest(self) -> dict[str, dict]:
+        try:
+            with open(self.manifest_path, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def input_hash(self, finding: Finding) -> str:
+        manager = self.latex_manager
+        latex = manager.convert_finding_to_latex("1.2.3", finding)
+        return manager.tex_pdf_cache_key(
+            manager.report_tex_file, {manager.finding_tex_file: latex}
+        )
+
+    def _export(self, finding: Finding, manifest: dict[str, dict]) -> ExportResult:
+        start = time.perf_counter()
+        output_file = os.path.join(self.output_folder, f"{finding.id}.pdf")
+        try:
+            input_hash = self.input_hash(finding)
+        except Exception as e:
+            return ExportResult(finding.id, "failed", error=str(e))
+        entry = manifest.get(finding.id, {})
+        if entry.get("input_hash") == input_hash and os.path.exists(output_file):
+            return ExportResult(finding.id, "unchanged")
+        try:
+            success, error = self.latex_manager.generate_single_finding_pdf(
+                finding, output_file
+            )
+        except Exception as e:
+            success, error = False, str(e)
+        seconds = time.perf_counter() - start
+        if not success:
+            return ExportResult(finding.id, "failed", seconds, error)
+        manifest[finding.id] = {"input_hash": input_hash, "pdf": f"{finding.id}.pdf"}
+        return ExportResult(finding.id, "built", seconds)
+
+    def export(
+        self, findings: list[Finding], force: bool = False
+    ) -> list[ExportResult]:
+        os.makedirs(self.output_folder, exist_ok=True)
+        previous = {} if force else self.load_manifest()
+        # entries of deleted findings are dropped; failed ones are kept so a
+        # later fix is compared against the last good export
+        manifest = {
+            finding.id: previous[finding.id]
+            for finding in findings
+            if finding.id in previous
+        }
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                results = list(
+                    pool.map(lambda finding: self._export(finding, manifest), findings)
+                )
+        finally:
+            write_json_atomic(self.manifest_path, manifest)
+        return results
+
+
+def print_summary(results: list[ExportResult], jobs: int, seconds: float):
+    counts = {"built": 0, "unchanged": 0, "failed": 0}
+    for result in results:
+        counts[result.status] += 1
+    print(
+        f"Exported {len(results)} findings with {jobs} jobs in {seconds:.1f}s: "
+        f"{counts['built']} built, {counts['unchanged']} unchanged, "
+        f"{counts['failed']} failed"
+    )
+    built = sorted(
+        (x for x in results if x.status == "built"), key=lambda x: -x.seconds
+    )
+    if built:
+        total = sum(x.seconds for x in built)
+        print(f"Build time: {total:.1f}s total, {total / len(built):.2f}s average")
+        print("Slowest builds:")
+        for result in built[:5]:
+            print(f"  {result.finding_id}: {result.seconds:.2f}s")
+    failed = [x for x in results if x.status == "failed"]
+    if failed:
+        print("Failed:")
+        for result in failed:
+            lines = result.error.strip().splitlines()
+            print(f"  {result.finding_id}: {lines[-1] if lines else 'unknown error'}")
+
+
+if __name__ == "__main__":
+    with open(resolve_path("config.yaml"), "r") as file:
+        yaml_config = yaml.safe_load(file)
+    parser = argparse.ArgumentParser(
+        description="Export every finding as its own PDF, skipping unchanged ones."
+    )
+    parser.add_argument(
+        "findings_folder",
+        nargs="?",
+        default=resolve_path(yaml_config["vuln_files_dir"]),
+        help="Path to folder containing JSON findings.",
+    )
+    parser.add_argument(
+        "output_folder",
+        nargs="?",
+        default=resolve_path(yaml_config["vuln_pdfs_dir"]),
+        help="Folder to write the PDFs and manifest.json to.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of findings to compile at once.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the manifest and rebuild every finding.",
+    )
+    args = parser.parse_args()
+    parsed_findings: list[Finding] = []
+    load_errors: list[ExportResult] = []
+    for path in iter_finding_files(args.findings_folder):
+        try:
+            parsed_findings.append(load_finding_file(path))
+        except Exception as e:
+            load_errors.append(
+                ExportResult(os.path.basename(path), "failed", error=str(e))
+            )
+    exporter = FindingPdfExporter(LatexManager(), args.output_folder, args.jobs)
+    start = time.perf_counter()
+    export_results = load_errors + exporter.export(parsed_findings, args.force)
+    print_summary(export_results, args.jobs, time.perf_counter() - start)
+    if any(result.status == "failed" for result in export_results):
+        raise SystemExit(1)
@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import yaml
+from util import *
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    risk INTEGER NOT NULL,
+    impact INTEGER NOT NULL,
+    likelihood INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finding_hosts (
+    finding_id TEXT NOT NULL REFERENCES findings(id) ON DELETE CASCADE,
+    ip TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finding_mitre (
+    finding_id TEXT NOT NULL REFERENCES findings(id) ON DELETE CASCADE,
+    technique TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_findings_risk ON findings(risk);
+-- title queries match substrings, which no index serves
+DROP INDEX IF EXISTS idx_findings_title;
+CREATE INDEX IF NOT EXISTS idx_finding_hosts_ip ON finding_hosts(ip);
+CREATE INDEX IF NOT EXISTS idx_finding_hosts_name ON finding_hosts(name);
+CREATE INDEX IF NOT EXISTS idx_finding_hosts_finding ON finding_hosts(finding_id);
+CREATE INDEX IF NOT EXISTS idx_finding_mitre_technique ON finding_mitre(technique);
+CREATE INDEX IF NOT EXISTS idx_finding_mitre_finding ON finding_mitre(finding_id);
+"""
+
+
+class JsonFindingsStore:
+    # the original layout: one <id>.json file per finding in vuln-data/
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    def path(self, finding_id: str) -> str:
+        return os.path.join(self.folder, f"{finding_id}.json")
+
+    def load_all(self) -> list[Finding]:
+        if not os.path.exists(self.folder):
+            return []
+        findings = []
+        for path in iter_finding_files(self.folder):
+            # one broken file shouldn't keep the GUI from starting
+            try:
+                findings.append(load_finding_file(path))
+            except Exception as e:
+                print(f"Error loading finding from {path}: {e}")
+        return findings
+
+    def save_many(self, findings: list[Finding]):
+        os.makedirs(self.folder, exist_ok=True)
+        for finding in findings:
+            write_json_atomic(self.path(finding.id), finding.to_json())
+
+    def delete(self, finding_id: str):
+        if os.path.exists(self.path(finding_id)):
+            os.remove(self.path(finding_id))
+
+
+class SqliteFindingsStore:
+    # Full finding JSON lives in findings.data; the columns and side tables
+    # only exist to answer risk/host/technique queries from indexes and
+    # title queries without parsing the JSON.
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _save(self, finding: Finding):
+        data = finding.to_json()
+        self.connection.execute("DELETE FROM findings WHERE id = ?", (finding.id,))
+        self.connection.execute(
+            "INSERT INTO findings (id, title, risk, impact, likelihood, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                finding.id,
+                data["title"],
+                finding.risk,
+                finding.impact,
+                finding.likelihood,
+                json.dumps(data),
+            ),
+        )
+        self.connection.executemany(
+            "INSERT INTO finding_hosts (finding_id, ip, name) VALUES (?, ?, ?)",
+            [(finding.id, x["ip"], x["name"]) for x in data["scope"]],
+        )
+        self.connection.executemany(
+            "INSERT INTO finding_mitre (finding_id, technique) VALUES (?, ?)",
+            [(finding.id, tid) for tid in data["mitre_techniques"]],
+        )
+
+    def save_many(self, findings: list[Finding]):
+        with self._lock, self.connection:
+            for finding in findings:
+                self._save(finding)
+
+    def delete(self, finding_id: str):
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM findings WHERE id = ?", (finding_id,))
+
+    def _select(self, where: str = "", params: tuple = ()) -> list[Finding]:
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT id, data FROM findings {where} ORDER BY id", params
+            ).fetchall()
+        return [Finding.build_from_json(id, json.loads(data)) for id, data in rows]
+
+    def load(self, finding_id: str) -> Finding | None:
+        findings = self._select("WHERE id = ?", (finding_id,))
+        return findings[0] if findings else None
+
+    def load_all(self) -> list[Finding]:
+        return self._select()
+
+    def query(
+        self,
+        risk: int | None = None,
+        host: str | None = None,
+        technique: str | None = None,
+        title: str | None = None,
+    ) -> list[Finding]:
+        clauses = []
+        params = []
+        if risk is not None:
+            clauses.append("risk = ?")
+            params.append(risk)
+        if host:
+            clauses.append(
+                "id IN (SELECT finding_id FROM finding_hosts WHERE ip = ? OR name = ?)"
+            )
+            params += [host, host]
+        if technique:
+            # T1110 also matches its sub-techniques (T1110.001, ...)
+            clauses.append(
+                "id IN (SELECT finding_id FROM finding_mitre "
+                "WHERE technique = ? OR technique LIKE ?)"
+            )
+            params += [technique, f"{technique}.%"]
+        if title:
+            clauses.append("title LIKE ?")
+            params.append(f"%{title}%")
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        return self._select(where, tuple(params))
+
+    def import_json_dir(self, folder: str) -> int:
+        findings = JsonFindingsStore(folder).load_all()
+        self.save_many(findings)
+        return len(findings)
+
+    def export_json_dir(self, folder: str) -> int:
+        findings = self.load_all()
+        JsonFindingsStore(folder).save_many(findings)
+        return len(findings)
+
+
+def open_findings_store(yaml_config: dict) -> JsonFindingsStore | SqliteFindingsStore:
+    if yaml_config.get("findings_backend", "json") == "sqlite":
+        return SqliteFindingsStore(
+            resolve_path(yaml_config.get("findings_db", "./findings.db"))
+        )
+    return JsonFindingsStore(resolve_path(yaml_config["vuln_files_dir"]))
+
+
+if __name__ == "__main__":
+    with open(resolve_path("config.yaml"), "r") as file:
+        yaml_config = yaml.safe_load(file)
+    risk_levels: list[str] = yaml_config["risk_levels"]
+    parser = argparse.ArgumentParser(description="Manage the SQLite findings store.")
+    parser.add_argument(
+        "--db",
+        default=resolve_path(yaml_config.get("findings_db", "./findings.db")),
+        help="Path to the SQLite database.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser(
+        "import", help="Import a JSON findings folder."
+    )
+    import_parser.add_argument("findings_folder")
+    export_parser = subparsers.add_parser(
+        "export", help="Export to a JSON findings folder."
+    )
+    export_parser.add_argument("findings_folder")
+    query_parser = subparsers.add_parser("query", help="List matching findings.")
+    query_parser.add_argument("--risk", choices=risk_levels)
+    query_parser.add_argument("--host", help="IP address or hostname.")
+    query_parser.add_argument("--technique", help="MITRE technique id, e.g. T1110.")
+    query_parser.add_argument("--title", help="Substring of the title.")
+    args = parser.parse_args()
+    store = SqliteFindingsStore(args.db)
+    if args.command == "import":
+        print(f"Imported {store.import_json_dir(args.findings_folder)} findings")
+    elif args.command == "export":
+        print(f"Exported {store.export_json_dir(args.findings_folder)} findings")
+    else:
+        findings = store.query(
+            risk=risk_levels.index(args.risk) if args.risk else None,
+            host=args.host,
+            technique=args.technique,
+            title=args.title,
+        )
+        for finding in findings:
+            print(f"{finding.id}\t{risk_levels[finding.risk]}\t{finding.title}")
+    store.close()
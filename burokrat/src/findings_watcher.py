@@ -0,0 +1,68 @@
+import os
+import threading
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+
+class FindingsWatcher(FileSystemEventHandler):
+    # Collects which finding files changed on disk between two drain() calls.
+    # Events are only recorded here; parsing happens in the caller so the
+    # watchdog thread never touches the findings list.
+    def __init__(self, folder: str):
+        super().__init__()
+        self.folder = folder
+        self._changed: set[str] = set()
+        self._deleted: set[str] = set()
+        self._lock = threading.Lock()
+        self.observer = Observer()
+
+    def start(self):
+        os.makedirs(self.folder, exist_ok=True)
+        self.observer.schedule(self, self.folder, recursive=False)
+        self.observer.daemon = True
+        self.observer.start()
+
+    def stop(self):
+        self.observer.stop()
+        self.observer.join()
+
+    def _is_finding_file(self, path: str) -> bool:
+        return path.endswith(".json") and os.path.dirname(
+            os.path.abspath(path)
+        ) == os.path.abspath(self.folder)
+
+    def _mark_changed(self, path: str):
+        if self._is_finding_file(path):
+            with self._lock:
+                self._deleted.discard(path)
+                self._changed.add(path)
+
+    def _mark_deleted(self, path: str):
+        if self._is_finding_file(path):
+            with self._lock:
+                self._changed.discard(path)
+                self._deleted.add(path)
+
+    def on_created(self, event: FileSystemEvent):
+        if not event.is_directory:
+            self._mark_changed(event.src_path)
+
+    def on_modified(self, event: FileSystemEvent):
+        if not event.is_directory:
+            self._mark_changed(event.src_path)
+
+    def on_moved(self, event: FileSystemEvent):
+        # atomic saves show up as a temp file renamed over the finding
+        if not event.is_directory:
+            self._mark_deleted(event.src_path)
+            self._mark_changed(event.dest_path)
+
+    def on_deleted(self, event: FileSystemEvent):
+        if not event.is_directory:
+            self._mark_deleted(event.src_path)
+
+    def drain(self) -> tuple[set[str], set[str]]:
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            deleted, self._deleted = self._deleted, set()
+        return changed, deleted
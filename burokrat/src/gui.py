@@ -1,28 +1,49 @@
 import streamlit as st
-import json
+import copy
 import os
+from streamlit.errors import StreamlitAPIException
 from streamlit_pdf_viewer import pdf_viewer
-import yaml
 from util import *
-from latex_manager import LatexManager
+from mitre_index import get_mitre_index
+from cvss_score import cvss_base_score, format_cvss_vector
+from shared_state import SharedState, serialize_finding
+from html_preview import HtmlPreview
+from preview_jobs import PreviewJobQueue, JOB_QUEUED, JOB_RUNNING, JOB_FAILED
+
+
+@st.cache_resource
+def get_shared_state() -> SharedState:
+    return SharedState()
 
 
 class ReportWriterGUI:
     def __init__(self):
+        self.shared = get_shared_state()
         self.load_config()
+        # copy-on-write overlay: findings this session has opened for editing
+        # are deep copies, everything else points at the shared snapshot
+        self.overlay: dict[str, Finding] = {}
+        # finding id -> saved version the overlay copy was taken from
+        self.overlay_base: dict[str, str | None] = {}
         self.findings: list[Finding] = []
-        self.load_findings()
+        self.version = -1
         self.selected_finding: int = 0
-        self.latex_manager = LatexManager()
+        self.latex_manager = self.shared.latex_manager
         self.cur_timestep = 0
-        self.is_errored: dict[int, bool] = {}
-        self.error_message: dict[int, str] = {}
+        self.revisions: dict[str, int] = {}
+        self.preview_jobs = PreviewJobQueue(self.latex_manager)
+        self.html_preview = HtmlPreview(self.latex_manager)
+        # serialized finding the HTML preview was last drawn from, and whether
+        # the current script run is a full app run rather than a fragment rerun
+        self.previewed = ""
+        self.full_run = False
+        # title the finding selector labels the current finding with
+        self.listed_title = ""
+        self.sync_findings()
 
     def load_config(self):
-        with open(resolve_path("config.yaml"), "r") as f:
-            yaml_config = yaml.safe_load(f)
+        yaml_config = self.shared.yaml_config
         self.vuln_file_prefix: str = yaml_config["vuln_file_prefix"]
-        self.vuln_files_dir: str = resolve_path(yaml_config["vuln_files_dir"])
         self.vuln_pdfs_dir: str = resolve_path(yaml_config["vuln_pdfs_dir"])
         self.risk_levels: list[str] = yaml_config["risk_levels"]
         self.impact_levels: list[str] = yaml_config["impact_levels"]
@@ -30,49 +51,147 @@ class ReportWriterGUI:
         self.mitre_techniques_file: str = resolve_path(
             yaml_config["mitre_techniques_file"]
         )
-        with open(self.mitre_techniques_file, "r") as f:
-            self.mitre_techniques = json.load(f)
-        self.mitre_id_to_name = {t["id"]: t["name"] for t in self.mitre_techniques}
 
-    def load_findings(self):
-        if not os.path.exists(self.vuln_files_dir):
+    def sync_findings(self):
+        # rebuild the session view when the shared snapshot changed; local
+        # edits win over files changed on disk, untouched copies follow disk
+        self.shared.apply_external_changes()
+        version, snapshot = self.shared.findings()
+        if version == self.version:
             return
-        for filename in os.listdir(self.vuln_files_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(self.vuln_files_dir, filename), "r") as f:
-                    data = json.load(f)
-                    id = filename.split(".json")[0]
-                    self.findings.append(Finding.build_from_json(id, data))
+        self.version = version
+        selected_id = (
+            self.findings[self.selected_finding].id if self.findings else None
+        )
+        released = set()
+        for finding_id, finding in list(self.overlay.items()):
+            base = self.overlay_base[finding_id]
+            saved = self.shared.saved_state.get(finding_id)
+            if base == saved:
+                continue
+            if serialize_finding(finding) == base:
+                released.add(finding_id)
+                del self.overlay[finding_id]
+                del self.overlay_base[finding_id]
+            else:
+                self.overlay_base[finding_id] = saved
+                st.toast(
+                    f"{finding_id} changed on disk; keeping your unsaved edits",
+                    icon=":material/warning:",
+                )
+        self.findings = [self.overlay.get(f.id, f) for f in snapshot]
+        shared_ids = {f.id for f in snapshot}
+        self.findings += [f for f in self.overlay.values() if f.id not in shared_ids]
         self.findings.sort(key=lambda x: x.id)
+        ids = [finding.id for finding in self.findings]
+        selected = ids.index(selected_id) if selected_id in ids else 0
+        for finding_id in released:
+            # widgets keep their own copy of values, so remount them
+            self.bump_revision(finding_id)
+        if selected != self.selected_finding:
+            self.update_timestep()
+        self.selected_finding = selected
 
-    def save_findings(self):
-        os.makedirs(self.vuln_files_dir, exist_ok=True)
-        for finding in self.findings:
-            with open(
-                os.path.join(self.vuln_files_dir, f"{finding.id}.json"), "w"
-            ) as f:
-                json.dump(finding.to_json(), f, indent=4)
+    def checkout(self, index: int) -> Finding:
+        # take a private copy before the widgets write into the finding
+        finding = self.findings[index]
+        if finding.id not in self.overlay:
+            finding = copy.deepcopy(finding)
+            self.overlay[finding.id] = finding
+            self.overlay_base[finding.id] = self.shared.saved_state.get(finding.id)
+            self.findings[index] = finding
+        return finding
+
+    def release_clean_copies(self):
+        # drop copies that match the saved version, except the one on screen
+        selected_id = (
+            self.findings[self.selected_finding].id if self.findings else None
+        )
+        for finding_id, finding in list(self.overlay.items()):
+            if finding_id != selected_id and self.shared.is_saved(finding):
+                del self.overlay[finding_id]
+                del self.overlay_base[finding_id]
+        _, snapshot = self.shared.findings()
+        by_id = {f.id: f for f in snapshot}
+        self.findings = [
+            self.overlay.get(f.id, by_id.get(f.id, f)) for f in self.findings
+        ]
+
+    def save_findings(self) -> list[str]:
+        written = self.shared.save(list(self.overlay.values()))
+        for finding_id in written:
+            self.overlay_base[finding_id] = self.shared.saved_state[finding_id]
+        self.release_clean_copies()
+        return written
+
+    def save_and_report(self):
+        written = self.save_findings()
+        if written:
+            st.toast(f"Saved {len(written)} finding(s): {', '.join(written)}")
+        else:
+            st.toast("No changes to save")
 
     def update_timestep(self):
+        # only the finding selector is keyed on this, so it can jump to a
+        # finding without remounting the editor
         self.cur_timestep += 1
 
+    def bump_revision(self, finding_id: str, section: str = ""):
+        # remount the widgets of one editor section, or of the whole finding
+        name = f"{finding_id}/{section}" if section else finding_id
+        self.revisions[name] = self.revisions.get(name, 0) + 1
+
+    def widget_key(self, finding: Finding, section: str, name: str, *index) -> str:
+        # stable across reruns; changes only when the finding is reloaded or
+        # rows are removed from this section
+        return "-".join(
+            [
+                section,
+                name,
+                *map(str, index),
+                finding.id,
+                str(self.revisions.get(finding.id, 0)),
+                str(self.revisions.get(f"{finding.id}/{section}", 0)),
+            ]
+        )
+
     def generate_pdf(self):
         if len(self.findings) > 0:
-            output_pdf_path = os.path.join(
-                self.vuln_pdfs_dir,
-                f"{self.findings[self.selected_finding].id}.pdf",
-            )
+            finding = self.findings[self.selected_finding]
+            output_pdf_path = os.path.join(self.vuln_pdfs_dir, f"{finding.id}.pdf")
             os.makedirs(self.vuln_pdfs_dir, exist_ok=True)
-            success, error_message = self.latex_manager.generate_single_finding_pdf(
-                self.findings[self.selected_finding], output_pdf_path
+            self.preview_jobs.submit(finding, output_pdf_path)
+
+    def render_preview(self, polling: bool):
+        finding = self.findings[self.selected_finding]
+        job = self.preview_jobs.get(finding.id)
+        if polling and not self.preview_jobs.has_pending(finding.id):
+            # the build finished while polling; rerun once to stop the timer
+            st.rerun()
+        if job is not None and job.status == JOB_QUEUED:
+            st.info("PDF build queued...")
+        elif job is not None and job.status == JOB_RUNNING:
+            st.info("Building PDF...")
+        if job is not None and job.status == JOB_FAILED:
+            st.error("Failed to generate PDF")
+            with st.expander("PDF Generation Error", expanded=True):
+                st.code(job.error_message)
+            return
+        output_pdf_path = os.path.join(self.vuln_pdfs_dir, f"{finding.id}.pdf")
+        if os.path.exists(output_pdf_path):
+            generation = job.generation if job is not None else 0
+            pdf_viewer(
+                output_pdf_path,
+                key=f"pdf-viewer-{finding.id}-{generation}",
             )
-            if not success:
-                st.error(f"Failed to generate PDF")
-                self.is_errored[self.selected_finding] = True
-                self.error_message[self.selected_finding] = error_message
-            else:
-                self.is_errored[self.selected_finding] = False
-                self.error_message[self.selected_finding] = ""
+
+    def render_html_preview(self):
+        finding = self.findings[self.selected_finding]
+        self.previewed = serialize_finding(finding)
+        try:
+            st.html(self.html_preview.convert_finding_to_html(finding))
+        except ValueError as e:
+            st.warning(str(e))
 
     def get_next_finding_id(self) -> int:
         cur = 1
@@ -81,299 +200,337 @@ class ReportWriterGUI:
             cur += 1
         return cur
 
+    def rerun_section(self):
+        # redraw just the section after a structural change; the click
+        # may also arrive in a full app run, where only a full rerun works
+        try:
+            st.rerun(scope="fragment")
+        except StreamlitAPIException:
+            st.rerun()
+
+    def refresh_preview(self, finding: Finding):
+        # the HTML preview and the finding selector are drawn by full app runs,
+        # so a section rerun that changed the finding triggers one; adding an
+        # empty row doesn't change the serialized finding and stays local
+        relabel = finding.title != self.listed_title
+        if relabel:
+            # the selector keeps its value under the old label, so remount it
+            self.listed_title = finding.title
+            self.update_timestep()
+        if relabel or (
+            not self.full_run and serialize_finding(finding) != self.previewed
+        ):
+            st.rerun()
+
+    # Each section below runs as its own st.fragment, so interacting with a
+    # widget (or adding/removing a row) only reruns that section.
+
+    def render_metadata(self, finding: Finding):
+        finding.title = st.text_input(
+            "Title",
+            value=finding.title,
+            key=self.widget_key(finding, "metadata", "title"),
+        )
+        finding.risk = st.selectbox(
+            "Overall Risk",
+            range(len(self.risk_levels)),
+            format_func=lambda x: self.risk_levels[x],
+            index=finding.risk,
+            key=self.widget_key(finding, "metadata", "risk"),
+        )
+        finding.impact = st.selectbox(
+            "Impact",
+            range(len(self.impact_levels)),
+            format_func=lambda x: self.impact_levels[x],
+            index=finding.impact,
+            key=self.widget_key(finding, "metadata", "impact"),
+        )
+        finding.likelihood = st.selectbox(
+            "Likelihood",
+            range(len(self.likelihood_levels)),
+            format_func=lambda x: self.likelihood_levels[x],
+            index=finding.likelihood,
+            key=self.widget_key(finding, "metadata", "likelihood"),
+        )
+        self.refresh_preview(finding)
+
+    def render_cvss(self, finding: Finding):
+        with st.expander("CVSS", expanded=False):
+            fix_str_error = lambda x: x if x else None
+            col1, col2 = st.columns(2)
+            for i, (part, details) in enumerate(CVSS_SECTIONS.items()):
+                sel_col = col1 if i % 2 == 0 else col2
+                finding.cvss_vector[part] = sel_col.segmented_control(
+                    f"{details['name']} ({part})",
+                    list(details["values"].keys()),
+                    format_func=lambda x: details["values"][x],
+                    key=self.widget_key(finding, "cvss", part),
+                    default=fix_str_error(finding.cvss_vector.get(part)),
+                    width="stretch",
+                    help=details.get("help", ""),
+                )
+            cvss_vector = format_cvss_vector(finding.cvss_vector)
+            if cvss_vector == "N/A":
+                st.caption("CVSS 4.0 Score: N/A (select every metric)")
+            else:
+                try:
+                    st.caption(f"CVSS 4.0 Score: {cvss_base_score(cvss_vector):.1f}")
+                except ValueError as e:
+                    st.warning(str(e))
+        self.refresh_preview(finding)
+
+    def render_scope(self, finding: Finding):
+        with st.expander("Scope", expanded=False):
+            for i, machine in enumerate(finding.scope):
+                col1, col2, col3 = st.columns([1, 2, 0.5], vertical_alignment="bottom")
+                machine.ip = col1.text_input(
+                    f"IP Address",
+                    label_visibility="collapsed" if i > 0 else "visible",
+                    value=machine.ip,
+                    placeholder="10.10.10.10",
+                    key=self.widget_key(finding, "scope", "machine-ip", i),
+                )
+                machine.name = col2.text_input(
+                    f"Machine Name",
+                    label_visibility="collapsed" if i > 0 else "visible",
+                    value=machine.name,
+                    placeholder="hostname.domain.local",
+                    key=self.widget_key(finding, "scope", "machine-name", i),
+                )
+                if col3.button(
+                    "",
+                    icon=":material/remove:",
+                    key=self.widget_key(finding, "scope", "machine-remove", i),
+                ):
+                    finding.scope.pop(i)
+                    self.bump_revision(finding.id, "scope")
+                    self.rerun_section()
+                for j, (service_name, service_port) in enumerate(machine.services):
+                    scol1, scol2, scol3, scol4 = st.columns(
+                        [1, 1, 1, 0.5], vertical_alignment="bottom"
+                    )
+                    service_name = scol2.text_input(
+                        f"Service Name",
+                        label_visibility="collapsed" if j > 0 else "visible",
+                        value=service_name,
+                        placeholder="HTTP",
+                        key=self.widget_key(finding, "scope", "service-name", i, j),
+                    )
+                    service_port = scol3.text_input(
+                        f"Port",
+                        label_visibility="collapsed" if j > 0 else "visible",
+                        value=service_port,
+                        placeholder="TCP/80",
+                        key=self.widget_key(finding, "scope", "service-port", i, j),
+                    )
+                    machine.services[j] = (service_name, service_port)
+                    if scol4.button(
+                        "",
+                        icon=":material/remove:",
+                        key=self.widget_key(finding, "scope", "service-remove", i, j),
+                    ):
+                        machine.services.pop(j)
+                        self.bump_revision(finding.id, "scope")
+                        self.rerun_section()
+                col1, col2, col3 = st.columns([1, 2, 0.5])
+                if col2.button(
+                    ":material/add: Add service",
+                    key=self.widget_key(finding, "scope", "add-service", i),
+                ):
+                    machine.services.append(("", ""))
+                    self.rerun_section()
+            if st.button(
+                "Add machine",
+                icon=":material/add:",
+                key=self.widget_key(finding, "scope", "add-machine"),
+            ):
+                finding.scope.append(MachineScope())
+                self.rerun_section()
+        self.refresh_preview(finding)
+
+    def render_description(self, finding: Finding):
+        finding.description = st.text_area(
+            "Description",
+            value=finding.description,
+            key=self.widget_key(finding, "description", "description"),
+        )
+        finding.business_impact = st.text_area(
+            "Business Impact",
+            value=finding.business_impact,
+            key=self.widget_key(finding, "description", "business-impact"),
+        )
+        mitre_index = get_mitre_index(self.mitre_techniques_file)
+        finding.mitre_techniques = st.multiselect(
+            "Select MITRE Techniques",
+            mitre_index.ids,
+            default=finding.mitre_techniques,
+            format_func=lambda tid: f"{tid} - {mitre_index.name(tid)}",
+            key=self.widget_key(finding, "description", "mitre-techniques"),
+        )
+        self.refresh_preview(finding)
+
+    def render_exploit_details(self, finding: Finding):
+        with st.expander("Exploit Details", expanded=False):
+            finding.exploit_details_raw = st.toggle(
+                "Raw LaTeX Mode",
+                value=finding.exploit_details_raw,
+                key=self.widget_key(finding, "exploit", "raw-toggle"),
+            )
+            if finding.exploit_details_raw:
+                if isinstance(finding.exploit_details, list):
+                    finding.exploit_details = "\n".join(finding.exploit_details)
+                finding.exploit_details = st.text_area(
+                    "Exploit Details",
+                    value=finding.exploit_details,
+                    key=self.widget_key(finding, "exploit", "area"),
+                )
+            else:
+                if isinstance(finding.exploit_details, str):
+                    finding.exploit_details = finding.exploit_details.splitlines()
+                for i, detail in enumerate(finding.exploit_details):
+                    detail_area_col, detail_remove_col = st.columns(
+                        [5, 0.5], vertical_alignment="top"
+                    )
+                    finding.exploit_details[i] = detail_area_col.text_area(
+                        f"Detail {i+1}",
+                        label_visibility="collapsed",
+                        value=detail,
+                        key=self.widget_key(finding, "exploit", "detail", i),
+                    )
+                    if detail_remove_col.button(
+                        "",
+                        icon=":material/remove:",
+                        key=self.widget_key(finding, "exploit", "detail-remove", i),
+                    ):
+                        finding.exploit_details.pop(i)
+                        self.bump_revision(finding.id, "exploit")
+                        self.rerun_section()
+                if st.button(
+                    "Add Step",
+                    icon=":material/add:",
+                    key=self.widget_key(finding, "exploit", "add-step"),
+                ):
+                    finding.exploit_details.append("")
+                    self.rerun_section()
+        self.refresh_preview(finding)
+
+    def render_remediation(self, finding: Finding):
+        finding.remediation = st.text_area(
+            "Remediation",
+            value=finding.remediation,
+            key=self.widget_key(finding, "remediation", "remediation"),
+        )
+        self.refresh_preview(finding)
+
+    def render_references(self, finding: Finding):
+        with st.expander("References", expanded=False):
+            ref_name_col, ref_url_col, ref_remove_col = st.columns([2, 2, 1])
+            for i, ref in enumerate(finding.references):
+                with ref_name_col:
+                    ref["name"] = st.text_input(
+                        f"Reference Name {i+1}",
+                        label_visibility="collapsed",
+                        placeholder="Example Reference",
+                        value=ref.get("name", ""),
+                        key=self.widget_key(finding, "references", "name", i),
+                    )
+                with ref_url_col:
+                    ref["url"] = st.text_input(
+                        f"Reference {i+1}",
+                        label_visibility="collapsed",
+                        placeholder="https://example.com",
+                        value=ref.get("url", ""),
+                        key=self.widget_key(finding, "references", "url", i),
+                    )
+                with ref_remove_col:
+                    if st.button(
+                        "",
+                        icon=":material/remove:",
+                        key=self.widget_key(finding, "references", "remove", i),
+                    ):
+                        finding.references.pop(i)
+                        self.bump_revision(finding.id, "references")
+                        self.rerun_section()
+            if st.button(
+                "Add Reference",
+                icon=":material/add:",
+                key=self.widget_key(finding, "references", "add"),
+            ):
+                finding.references.append({"name": "", "url": ""})
+                self.rerun_section()
+        self.refresh_preview(finding)
+
     def render(self) -> bool:
         rerun = False
+        self.full_run = True
 
         st.set_page_config(layout="wide")
+        self.sync_findings()
         user_input, pdf_preview = st.columns(2)
         with user_input:
             if st.button(
                 "Create New Vulnerability",
                 use_container_width=True,
-                key=f"create-new-vuln-{self.cur_timestep}",
+                key="create-new-vuln",
             ):
                 new_finding_id = f"{self.vuln_file_prefix}-{self.get_next_finding_id():03d}"
                 new_finding = Finding(new_finding_id)
+                self.overlay[new_finding_id] = new_finding
+                self.overlay_base[new_finding_id] = None
                 self.findings.append(new_finding)
                 self.selected_finding = len(self.findings) - 1
+                # a new finding has no scope yet, so show it under all hosts
+                st.session_state["host-filter"] = None
                 self.update_timestep()
+                self.full_run = False
                 return True
+            host_labels = dict(self.shared.hosts())
+            host = st.selectbox(
+                "Findings on Host",
+                [None, *host_labels],
+                format_func=lambda x: "All hosts" if x is None else host_labels[x],
+                key="host-filter",
+                on_change=self.update_timestep,
+            )
+            options = list(range(len(self.findings)))
+            if host is not None:
+                # the index covers saved findings, so unsaved scope edits
+                # only move a finding between hosts once it is saved
+                on_host = self.shared.findings_on_host(host)
+                options = [i for i in options if self.findings[i].id in on_host]
+                options = options or list(range(len(self.findings)))
             self.selected_finding = st.selectbox(
                 "Vulnerability",
-                range(len(self.findings)),
+                options,
                 format_func=lambda x: f"{self.findings[x].id} ({self.findings[x].title})",
-                index=self.selected_finding,
+                index=(
+                    options.index(self.selected_finding)
+                    if self.selected_finding in options
+                    else 0
+                ),
                 key=f"vuln-select-{self.cur_timestep}",
             )
             if len(self.findings) > 0:
-                self.findings[self.selected_finding].title = st.text_input(
-                    "Title",
-                    value=self.findings[self.selected_finding].title,
-                    key=f"title-{self.selected_finding}-{self.cur_timestep}",
-                )
-                self.findings[self.selected_finding].risk = st.selectbox(
-                    "Overall Risk",
-                    range(len(self.risk_levels)),
-                    format_func=lambda x: self.risk_levels[x],
-                    index=self.findings[self.selected_finding].risk,
-                    key=f"risk-{self.selected_finding}-{self.cur_timestep}",
-                )
-                self.findings[self.selected_finding].impact = st.selectbox(
-                    "Impact",
-                    range(len(self.impact_levels)),
-                    format_func=lambda x: self.impact_levels[x],
-                    index=self.findings[self.selected_finding].impact,
-                    key=f"impact-{self.selected_finding}-{self.cur_timestep}",
-                )
-                self.findings[self.selected_finding].likelihood = st.selectbox(
-                    "Likelihood",
-                    range(len(self.likelihood_levels)),
-                    format_func=lambda x: self.likelihood_levels[x],
-                    index=self.findings[self.selected_finding].likelihood,
-                    key=f"likelihood-{self.selected_finding}-{self.cur_timestep}",
-                )
-                with st.expander("CVSS", expanded=False):
-                    fix_str_error = lambda x: x if x else None
-                    col1, col2 = st.columns(2)
-                    for i, (part, details) in enumerate(CVSS_SECTIONS.items()):
-                        sel_col = col1 if i % 2 == 0 else col2
-                        self.findings[self.selected_finding].cvss_vector[part] = (
-                            sel_col.segmented_control(
-                                f"{details['name']} ({part})",
-                                list(details["values"].keys()),
-                                format_func=lambda x: details["values"][x],
-                                key=f"cvss-{part}-{self.selected_finding}-{self.cur_timestep}",
-                                default=fix_str_error(
-                                    self.findings[
-                                        self.selected_finding
-                                    ].cvss_vector.get(part)
-                                ),
-                                width="stretch",
-                                help=details.get("help", ""),
-                            )
-                        )
-                with st.expander("Scope", expanded=False):
-                    for i, machine in enumerate(
-                        self.findings[self.selected_finding].scope
-                    ):
-                        col1, col2, col3 = st.columns(
-                            [1, 2, 0.5], vertical_alignment="bottom"
-                        )
-                        machine.ip = col1.text_input(
-                            f"IP Address",
-                            label_visibility="collapsed" if i > 0 else "visible",
-                            value=machine.ip,
-                            placeholder="10.10.10.10",
-                            key=f"machine-ip-{self.selected_finding}-{i}-{self.cur_timestep}",
-                        )
-                        machine.name = col2.text_input(
-                            f"Machine Name",
-                            label_visibility="collapsed" if i > 0 else "visible",
-                            value=machine.name,
-                            placeholder="hostname.domain.local",
-                            key=f"machine-name-{self.selected_finding}-{i}-{self.cur_timestep}",
-                        )
-                        if col3.button(
-                            "",
-                            icon=":material/remove:",
-                            key=f"machine-remove-{self.selected_finding}-{i}-{self.cur_timestep}",
-                        ):
-                            self.findings[self.selected_finding].scope.pop(i)
-                            return True
-                        for j, service in enumerate(machine.services):
-                            scol1, scol2, scol3, scol4 = st.columns(
-                                [1, 1, 1, 0.5], vertical_alignment="bottom"
-                            )
-                            machine.services[j]["name"] = scol2.text_input(
-                                f"Service Name",
-                                label_visibility="collapsed" if j > 0 else "visible",
-                                value=service["name"],
-                                placeholder="HTTP",
-                                key=f"service-name-{self.selected_finding}-{i}-{j}-{self.cur_timestep}",
-                            )
-                            machine.services[j]["port"] = scol3.text_input(
-                                f"Port",
-                                label_visibility="collapsed" if j > 0 else "visible",
-                                value=service["port"],
-                                placeholder="TCP/80",
-                                key=f"service-port-{self.selected_finding}-{i}-{j}-{self.cur_timestep}",
-                            )
-                            if scol4.button(
-                                "",
-                                icon=":material/remove:",
-                                key=f"service-remove-{self.selected_finding}-{i}-{j}-{self.cur_timestep}",
-                            ):
-                                machine.services.pop(j)
-                                self.findings[self.selected_finding].scope[i] = machine
-                                self.update_timestep()
-                                return True
-                        col1, col2, col3 = st.columns([1, 2, 0.5])
-                        if col2.button(
-                            ":material/add: Add service",
-                            key=f"add-service-{self.selected_finding}-{i}-{self.cur_timestep}",
-                        ):
-                            machine.services.append({"name": "", "port": ""})
-                            self.findings[self.selected_finding].scope[i] = machine
-                            return True
-                        self.findings[self.selected_finding].scope[i] = machine
-                    if st.button(
-                        "Add machine",
-                        icon=":material/add:",
-                        key=f"add-machine-{self.selected_finding}-{self.cur_timestep}",
-                    ):
-                        self.findings[self.selected_finding].scope.append(
-                            MachineScope()
-                        )
-                        return True
-                self.findings[self.selected_finding].description = st.text_area(
-                    "Description",
-                    value=self.findings[self.selected_finding].description,
-                    key=f"description-{self.selected_finding}-{self.cur_timestep}",
-                )
-                self.findings[self.selected_finding].business_impact = st.text_area(
-                    "Business Impact",
-                    value=self.findings[self.selected_finding].business_impact,
-                    key=f"business-impact-{self.selected_finding}-{self.cur_timestep}",
-                )
-                self.findings[self.selected_finding].mitre_techniques = st.multiselect(
-                    "Select MITRE Techniques",
-                    list(self.mitre_id_to_name.keys()),
-                    default=self.findings[self.selected_finding].mitre_techniques,
-                    format_func=lambda tid: f"{tid} - {self.mitre_id_to_name.get(tid, '')}",
-                    key=f"mitre-techniques-{self.selected_finding}-{self.cur_timestep}",
-                )
-                with st.expander("Exploit Details", expanded=False):
-                    self.findings[self.selected_finding].exploit_details_raw = (
-                        st.toggle(
-                            "Raw LaTeX Mode",
-                            value=self.findings[
-                                self.selected_finding
-                            ].exploit_details_raw,
-                            key=f"exploit-details-raw-toggle-{self.selected_finding}-{self.cur_timestep}",
-                        )
-                    )
-                    if self.findings[self.selected_finding].exploit_details_raw:
-                        if isinstance(
-                            self.findings[self.selected_finding].exploit_details, list
-                        ):
-                            self.findings[self.selected_finding].exploit_details = (
-                                "\n".join(
-                                    self.findings[self.selected_finding].exploit_details
-                                )
-                            )
-                        self.findings[self.selected_finding].exploit_details = (
-                            st.text_area(
-                                "Exploit Details",
-                                value=self.findings[
-                                    self.selected_finding
-                                ].exploit_details,
-                                key=f"exploit-details-area-{self.selected_finding}-{self.cur_timestep}",
-                            )
-                        )
-                    else:
-                        if isinstance(
-                            self.findings[self.selected_finding].exploit_details, str
-                        ):
-                            self.findings[self.selected_finding].exploit_details = (
-                                self.findings[
-                                    self.selected_finding
-                                ].exploit_details.splitlines()
-                            )
-                        for i, detail in enumerate(
-                            self.findings[self.selected_finding].exploit_details
-                        ):
-                            detail_area_col, detail_remove_col = st.columns(
-                                [5, 0.5], vertical_alignment="top"
-                            )
-                            new_detail = detail_area_col.text_area(
-                                f"Detail {i+1}",
-                                label_visibility="collapsed",
-                                value=detail,
-                                key=f"exploit-detail-{self.selected_finding}-{i}-{self.cur_timestep}",
-                            )
-                            self.findings[self.selected_finding].exploit_details[
-                                i
-                            ] = new_detail
-                            if detail_remove_col.button(
-                                "",
-                                icon=":material/remove:",
-                                key=f"exploit-detail-remove-{self.selected_finding}-{i}-{self.cur_timestep}",
-                            ):
-                                self.findings[
-                                    self.selected_finding
-                                ].exploit_details.pop(i)
-                                self.update_timestep()
-                                return True
-                        if st.button(
-                            "Add Step",
-                            icon=":material/add:",
-                            key=f"add-step-{self.selected_finding}-{self.cur_timestep}",
-                        ):
-                            self.findings[self.selected_finding].exploit_details.append(
-                                ""
-                            )
-                            return True
-                self.findings[self.selected_finding].remediation = st.text_area(
-                    "Remediation",
-                    value=self.findings[self.selected_finding].remediation,
-                    key=f"remediation-{self.selected_finding}-{self.cur_timestep}",
-                )
-                with st.expander("References", expanded=False):
-                    ref_name_col, ref_url_col, ref_remove_col = st.columns([2, 2, 1])
-                    for i, ref in enumerate(
-                        self.findings[self.selected_finding].references
-                    ):
-                        with ref_name_col:
-                            new_ref_name = st.text_input(
-                                f"Reference Name {i+1}",
-                                label_visibility="collapsed",
-                                placeholder="Example Reference",
-                                value=ref.get("name", ""),
-                                key=f"ref_name-{self.selected_finding}-{i}-{self.cur_timestep}",
-                            )
-                            self.findings[self.selected_finding].references[i][
-                                "name"
-                            ] = new_ref_name
-                        with ref_url_col:
-                            new_ref_url = st.text_input(
-                                f"Reference {i+1}",
-                                label_visibility="collapsed",
-                                placeholder="https://example.com",
-                                value=ref.get("url", ""),
-                                key=f"ref_url-{self.selected_finding}-{i}-{self.cur_timestep}",
-                            )
-                            self.findings[self.selected_finding].references[i][
-                                "url"
-                            ] = new_ref_url
-                        with ref_remove_col:
-                            if st.button(
-                                "",
-                                icon=":material/remove:",
-                                key=f"remove_ref-{self.selected_finding}-{i}-{self.cur_timestep}",
-                            ):
-                                self.findings[self.selected_finding].references.pop(i)
-                                self.update_timestep()
-                                return True
-                    if st.button(
-                        "Add Reference",
-                        icon=":material/add:",
-                        key=f"add-reference-{self.selected_finding}-{self.cur_timestep}",
-                    ):
-                        self.findings[self.selected_finding].references.append(
-                            {"name": "", "url": ""}
-                        )
-                        return True
+                finding = self.checkout(self.selected_finding)
+                self.listed_title = finding.title
+                st.fragment(self.render_metadata)(finding)
+                st.fragment(self.render_cvss)(finding)
+                st.fragment(self.render_scope)(finding)
+                st.fragment(self.render_description)(finding)
+                st.fragment(self.render_exploit_details)(finding)
+                st.fragment(self.render_remediation)(finding)
+                st.fragment(self.render_references)(finding)
                 col1, col2 = st.columns(2)
                 if col1.button(
                     "Save All Findings",
                     use_container_width=True,
-                    key=f"save-all-findings-bottom-{self.cur_timestep}",
+                    key="save-all-findings-bottom",
                 ):
-                    self.save_findings()
+                    self.save_and_report()
                 if col2.button(
                     "Generate PDF for Current Finding",
                     use_container_width=True,
-                    key=f"generate-pdf-bottom-{self.cur_timestep}",
+                    key="generate-pdf-bottom",
                 ):
                     self.generate_pdf()
         with pdf_preview:
@@ -381,29 +538,31 @@ class ReportWriterGUI:
             if col1.button(
                 "Save All Findings",
                 use_container_width=True,
-                key=f"save-all-findings-{self.cur_timestep}",
+                key="save-all-findings",
             ):
-                self.save_findings()
+                self.save_and_report()
             if col2.button(
                 "Generate PDF for Current Finding",
                 use_container_width=True,
-                key=f"generate-pdf-{self.cur_timestep}",
+                key="generate-pdf",
             ):
                 self.generate_pdf()
             if len(self.findings) > 0:
-                if self.is_errored.get(self.selected_finding, False):
-                    with st.expander("PDF Generation Error", expanded=True):
-                        st.code(self.error_message.get(self.selected_finding, ""))
-                else:
-                    output_pdf_path = os.path.join(
-                        self.vuln_pdfs_dir,
-                        f"{self.findings[self.selected_finding].id}.pdf",
+                html_tab, pdf_tab = st.tabs(["Preview", "PDF"])
+                with html_tab:
+                    # redrawn by the full run a changed section triggers, see
+                    # refresh_preview()
+                    self.render_html_preview()
+                with pdf_tab:
+                    # poll while a build is queued or running so the preview
+                    # updates on its own without blocking the editor
+                    polling = self.preview_jobs.has_pending(
+                        self.findings[self.selected_finding].id
                     )
-                    if os.path.exists(output_pdf_path):
-                        pdf_viewer(
-                            output_pdf_path,
-                            key=f"pdf-viewer-{self.selected_finding}-{self.cur_timestep}",
-                        )
+                    st.fragment(
+                        self.render_preview, run_every=1 if polling else None
+                    )(polling)
+        self.full_run = False
         return rerun
 
 
@@ -0,0 +1,174 @@
+import argparse
+import ipaddress
+from collections import Counter
+from typing import Iterable
+from util import *
+from latex_manager import LatexManager, escape_latex_special_chars, finding_label
+
+
+def host_key(machine: MachineScope) -> str:
+    # hosts are identified by IP when there is one, like the overview stats
+    return machine.ip.strip() or machine.name.strip()
+
+
+def host_sort_key(host: str) -> tuple:
+    # IPs in numeric order, then host names
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return (1, 0, host.lower())
+    return (0, address.version, int(address))
+
+
+class HostIndex:
+    # Inverted index of the findings' scope: host -> finding ids and
+    # (service, port) -> finding ids. Each finding's contribution is kept so
+    # update() and remove() only touch the hosts and services of that finding
+    # instead of rescanning the corpus.
+    hosts: dict[str, set[str]]
+    services: dict[tuple[str, str], set[str]]
+    host_names: dict[str, Counter[str]]
+
+    def __init__(self):
+        self.hosts = {}
+        self.services = {}
+        self.host_names = {}
+        # finding id -> host -> (names, (service, port) pairs) on that host
+        self._entries: dict[str, dict[str, tuple[set[str], set[tuple[str, str]]]]] = {}
+
+    @staticmethod
+    def build_from_findings(findings: Iterable[Finding]) -> "HostIndex":
+        index = HostIndex()
+        for finding in findings:
+            index.add(finding)
+        return index
+
+    def add(self, finding: Finding):
+        entry: dict[str, tuple[set[str], set[tuple[str, str]]]] = {}
+        for machine in finding.scope:
+            host = host_key(machine)
+            if not host:
+                continue
+            names, services = entry.setdefault(host, (set(), set()))
+            if machine.ip.strip() and machine.name.strip():
+                names.add(machine.name.strip())
+            for name, port in machine.services:
+                if name.strip() or port.strip():
+                    services.add((name.strip(), port.strip()))
+        self._entries[finding.id] = entry
+        for host, (names, services) in entry.items():
+            self.hosts.setdefault(host, set()).add(finding.id)
+            self.host_names.setdefault(host, Counter()).update(names)
+            for service in services:
+                self.services.setdefault(service, set()).add(finding.id)
+
+    def remove(self, finding_id: str):
+        entry = self._entries.pop(finding_id, None)
+        if entry is None:
+            return
+        for host, (names, services) in entry.items():
+            self._discard(self.hosts, host, finding_id)
+            host_names = self.host_names[host]
+            host_names.subtract(names)
+            for name in names:
+                if host_names[name] <= 0:
+                    del host_names[name]
+            if host not in self.hosts:
+                del self.host_names[host]
+            for service in services:
+                self._discard(self.services, service, finding_id)
+
+    def update(self, finding: Finding):
+        self.remove(finding.id)
+        self.add(finding)
+
+    @staticmethod
+    def _discard(index: dict, key, finding_id: str):
+        ids = index.get(key)
+        if ids is None:
+            return
+        ids.discard(finding_id)
+        if not ids:
+            del index[key]
+
+    def sorted_hosts(self) -> list[str]:
+        return sorted(self.hosts, key=host_sort_key)
+
+    def host_label(self, host: str) -> str:
+        names = sorted(self.host_names.get(host, ()))
+        return f"{host} ({', '.join(names)})" if names else host
+
+    def findings_on_host(self, host: str) -> set[str]:
+        return set(self.hosts.get(host, ()))
+
+    def findings_on_service(self, name: str, port: str) -> set[str]:
+        return set(self.services.get((name, port), ()))
+
+    def services_on_host(self, host: str) -> list[tuple[str, str]]:
+        services = set()
+        for finding_id in self.hosts.get(host, ()):
+            services |= self._entries[finding_id][host][1]
+        return sorted(services, key=lambda x: (x[1], x[0]))
+
+    def to_latex(self, latex_manager: LatexManager, findings: list[Finding]) -> str:
+        # findings are listed in report order and cited by the number of
+        # their heading, which \vulnreport labels with finding_label()
+        ordered = latex_manager.sort_findings(findings)
+        numbers = {finding.id: i for i, finding in enumerate(ordered, start=1)}
+        risks = {finding.id: finding.risk for finding in findings}
+        latex = r"\begin{longtable}{p{5cm}p{6.5cm}p{2.2cm}p{4cm}}" + "\n"
+        header = (
+            r"\textbf{Host} & \textbf{Services} & \textbf{Highest Risk} & "
+            r"\textbf{Findings} \\ \hline" + "\n"
+        )
+        latex += header + r"\endfirsthead" + "\n" + header + r"\endhead" + "\n"
+        for host in self.sorted_hosts():
+            finding_ids = [x for x in self.hosts[host] if x in numbers]
+            if not finding_ids:
+                continue
+            services = ", ".join(
+                f"{name} ({port})" if name and port else name or port
+                for name, port in self.services_on_host(host)
+            )
+            highest = max(risks[x] for x in finding_ids)
+            latex += (
+                escape_latex_special_chars(self.host_label(host))
+                + " & "
+                + (escape_latex_special_chars(services) or "N/A")
+                + " & "
+                + latex_manager.risk_levels[highest]
+                + " & "
+                + ", ".join(
+                    f"\\ref{{{finding_label(x)}}}"
+                    for x in sorted(finding_ids, key=numbers.get)
+                )
+                + r" \\"
+                + "\n"
+            )
+        latex += r"\end{longtable}"
+        return latex
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate the affected assets appendix from a folder of findings."
+    )
+    parser.add_argument(
+        "findings_folder", help="Path to folder containing JSON findings."
+    )
+    parser.add_argument(
+        "output_file",
+        nargs="?",
+        default=resolve_path("latex/sections/affected_assets.tex"),
+        help="Path to output LaTeX file.",
+    )
+    args = parser.parse_args()
+    parsed_findings: list[Finding] = []
+    for path in iter_finding_files(args.findings_folder):
+        try:
+            parsed_findings.append(load_finding_file(path))
+        except Exception as e:
+            print(f"Error loading finding from {path}: {e}")
+    host_index = HostIndex.build_from_findings(parsed_findings)
+    with open(args.output_file, "w") as file:
+        file.write(host_index.to_latex(LatexManager(), parsed_findings) + "\n")
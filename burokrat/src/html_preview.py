@@ -0,0 +1,139 @@
+import html
+from util import *
+from latex_manager import LatexManager, split_latex_sections
+from mitre_index import get_mitre_index
+
+# category -> (fg, bg, boxbg), mirrors latex/category_colors.tex
+CATEGORY_COLORS = {
+    4: ("#674ea7", "#ede5ff", "#674ea7"),
+    3: ("#e10018", "#fae2e2", "#e16567"),
+    2: ("#e89a4c", "#faecde", "#f6b26b"),
+    1: ("#f4cd61", "#fff9ee", "#f4cd61"),
+    0: ("#004c99", "#cce5ff", "#5c9ae6"),
+}
+
+PREVIEW_STYLE = """
+<style>
+.finding-preview { font-family: Helvetica, Arial, sans-serif; background: #f2f2f2; padding: 1.5em; }
+.finding-preview h3 { margin: 0 0 0.8em 0; }
+.finding-preview h4 { margin: 1em 0 0.3em 0; }
+.finding-preview .risk-box { color: white; font-weight: bold; text-align: center; padding: 0.3em 1em; display: inline-block; }
+.finding-preview table { border-collapse: collapse; width: 100%; }
+.finding-preview td { padding: 0.2em 0.5em 0.2em 0; vertical-align: top; }
+.finding-preview .scope-group { border-bottom: 1px solid gray; }
+.finding-preview .raw-latex { background: #d9d9d9; border-left: 4px solid #434343; font-family: monospace; white-space: pre-wrap; padding: 0 0.3em; }
+</style>
+"""
+
+
+class HtmlPreview:
+    # Renders a finding with the same field pipeline as
+    # LatexManager.convert_finding_to_latex, but to HTML, so the GUI can show
+    # edits without a TeX run. Raw LaTeX sections are shown verbatim.
+    def __init__(self, latex_manager: LatexManager):
+        self.latex_manager = latex_manager
+
+    def escape_html(self, text: str) -> str:
+        parts = split_latex_sections(text)
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                parts[i] = html.escape(part).replace("\n", "<br>")
+            else:
+                parts[i] = f'<span class="raw-latex">{html.escape(part)}</span>'
+        return "".join(parts)
+
+    def convert_scope_to_html(self, scope: list[MachineScope]) -> str:
+        html_scope = "<table>"
+        for rows in self.latex_manager.scope_table_rows(scope):
+            for i, row in enumerate(rows):
+                row_class = ' class="scope-group"' if i == len(rows) - 1 else ""
+                html_scope += (
+                    f"<tr{row_class}>"
+                    + "".join(f"<td>{html.escape(cell)}</td>" for cell in row)
+                    + "</tr>"
+                )
+        html_scope += "</table>"
+        return html_scope
+
+    def convert_exploit_details_to_html(self, details: str | list[str]) -> str:
+        if isinstance(details, str):
+            if not details.strip():
+                return "N/A"
+            return f'<div class="raw-latex">{html.escape(details)}</div>'
+        if len(details) == 0:
+            return "N/A"
+        return (
+            "<ol>"
+            + "".join(
+                f"<li>{self.escape_html(detail.strip())}</li>" for detail in details
+            )
+            + "</ol>"
+        )
+
+    def convert_references_to_html(self, references: list[dict[str, str]]) -> str:
+        if not references:
+            return "N/A"
+        return (
+            "<ul>"
+            + "".join(
+                f'<li><a href="{html.escape(ref.get("url", ""))}">'
+                f'{html.escape(ref.get("name", ""))}</a></li>'
+                for ref in references
+            )
+            + "</ul>"
+        )
+
+    def convert_mitre_techniques_to_html(self, mitre_techniques: list[str]) -> str:
+        if not mitre_techniques:
+            return "N/A"
+        mitre_index = get_mitre_index(
+            resolve_path(self.latex_manager.mitre_techniques_file)
+        )
+        cells = []
+        for tid in mitre_techniques:
+            technique = self.latex_manager.resolve_mitre_technique(mitre_index, tid)
+            if not technique:
+                continue
+            name, url = technique
+            cells.append(
+                f'<td><a href="{html.escape(url)}">{html.escape(tid)}</a> - '
+                f"{html.escape(name)}</td>"
+            )
+        rows = ["".join(cells[i : i + 2]) for i in range(0, len(cells), 2)]
+        return "<table>" + "".join(f"<tr>{row}</tr>" for row in rows) + "</table>"
+
+    def convert_finding_to_html(self, finding: Finding) -> str:
+        # raises ValueError on mismatched raw LaTeX markers, like the PDF build
+        manager = self.latex_manager
+        cvss_vector_str = manager.generate_cvss_vector_str(finding.cvss_vector)
+        fg, bg, boxbg = CATEGORY_COLORS[finding.risk + 1]
+        return f"""{PREVIEW_STYLE}
+<div class="finding-preview" style="border-left: 3px solid {fg};">
+<h3 style="color: {fg}; background: {bg}; padding: 0.3em;">{self.escape_html(finding.title.strip())}</h3>
+<table>
+<tr>
+<td rowspan="2"><b>Risk</b><br><span class="risk-box" style="background: {boxbg};">{manager.risk_levels[finding.risk].upper()}</span></td>
+<td><b>Impact</b><br>{manager.impact_levels[finding.impact]}</td>
+<td><b>CVSS Score</b><br>{manager.calculate_cvss_score(cvss_vector_str)}</td>
+</tr>
+<tr>
+<td><b>Likelihood</b><br>{manager.likelihood_levels[finding.likelihood]}</td>
+<td><b>CVSS Vector</b><br>{html.escape(cvss_vector_str)}</td>
+</tr>
+</table>
+<h4>Affected Scope</h4>
+{self.convert_scope_to_html(finding.scope)}
+<h4>Vulnerability Description</h4>
+<div>{self.escape_html(finding.description.strip())}</div>
+<h4>Business Impact Description</h4>
+<div>{self.escape_html(finding.business_impact.strip())}</div>
+<h4>MITRE ATT&amp;CK</h4>
+{self.convert_mitre_techniques_to_html(finding.mitre_techniques)}
+<h4>Exploitation Details</h4>
+{self.convert_exploit_details_to_html(finding.exploit_details)}
+<h4>Remediation</h4>
+<div>{self.escape_html(finding.remediation.strip())}</div>
+<h4>References</h4>
+{self.convert_references_to_html(finding.references)}
+</div>
+"""
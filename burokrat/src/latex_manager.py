@@ -1,15 +1,29 @@
 import yaml
 from util import *
 import os
+import re
+import signal
 import subprocess
-from cvss import CVSS4
-import json
+import threading
 import argparse
+import io
+from typing import Iterable, Iterator, TextIO
+from concurrent.futures import Future
+from functools import lru_cache
+from build_cache import BuildCache, copy_file_atomic
+from tex_format import PreambleFormat
+from evidence_images import EvidenceImages
+from tex_build import WorkspaceCache, get_workspace_cache
+from tex_worker import TexWorkerPool, get_tex_worker_pool
+from build_trace import BuildTrace, BuildTracer, LatexmkPassTimer, activate, span
+from mitre_index import MitreIndex, get_mitre_index
+from cvss_score import cvss_base_score, format_cvss_vector
 
 
 FINDING_TEMPLATE = """
 \\vulnreport[
     number={{{number}}},
+    label={{{label}}},
     title={{{title}}},
     category={{{category}}},
     risk={{{risk}}},
@@ -42,7 +56,90 @@ LATEX_ESCAPE_MAP = {
     "\n": r"\\",
 }
 
+LATEX_ESCAPE_TABLE = str.maketrans(LATEX_ESCAPE_MAP)
+
+LATEX_ESCAPE_SENTINEL = "\x00"
+
+
+def compile_escape_plan(escape_map: dict[str, str]) -> list[tuple[str, str]]:
+    # Order str.replace passes so no pass rewrites the output of an earlier one:
+    # a character is replaced before any character whose replacement contains
+    # it. The backslash appears in every replacement, so it is parked on a
+    # sentinel first and expanded last.
+    remaining = [char for char in escape_map if char != "\\"]
+    plan = [("\\", LATEX_ESCAPE_SENTINEL)]
+    while remaining:
+        for char in remaining:
+            if not any(
+                other in escape_map[char] for other in remaining if other != char
+            ):
+                break
+        else:
+            char = remaining[0]
+        plan.append((char, escape_map[char]))
+        remaining.remove(char)
+    plan.append((LATEX_ESCAPE_SENTINEL, escape_map["\\"]))
+    return plan
+
+
+LATEX_ESCAPE_PLAN = compile_escape_plan(LATEX_ESCAPE_MAP)
+
 LATEX_SECTION_IDENTIFIER = "***"
+# fields longer than this are not memoized, which bounds the escape cache to
+# about 1024 entries of this size plus their escaped copies
+ESCAPE_CACHE_MAX_CHARS = 16 * 1024
+
+
+def kill_process_group(process: subprocess.Popen, killed: threading.Event):
+    killed.set()
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def finding_label(finding_id: str) -> str:
+    # \label of a finding's heading, so other sections can \ref its number
+    return "finding:" + re.sub(r"[^\w.:-]", "-", finding_id)
+
+
+def escape_latex_special_chars(text: str) -> str:
+    if LATEX_ESCAPE_SENTINEL in text:
+        return text.translate(LATEX_ESCAPE_TABLE)
+    for char, replacement in LATEX_ESCAPE_PLAN:
+        if char in text:
+            text = text.replace(char, replacement)
+    return text
+
+
+def split_latex_sections(text: str) -> list[str]:
+    # even indexes are plain text, odd indexes are raw LaTeX that was
+    # enclosed in LATEX_SECTION_IDENTIFIER
+    parts = text.split(LATEX_SECTION_IDENTIFIER)
+    if len(parts) % 2 == 0:
+        raise ValueError(
+            "Mismatched LaTeX section identifiers (ensure that all sections are properly closed)."
+        )
+    return parts
+
+
+def _escape_latex_text(text: str) -> str:
+    parts = split_latex_sections(text)
+    parts[::2] = [escape_latex_special_chars(part) for part in parts[::2]]
+    return "".join(parts)
+
+
+_memoized_escape_latex_text = lru_cache(maxsize=1024)(_escape_latex_text)
+
+
+def escape_latex_text(text: str) -> str:
+    # Escape special LaTeX characters in the given text
+    # anything enclosed in LATEX_SECTION_IDENTIFIER should not be escaped
+    # memoized since unchanged fields are re-escaped on every build, except
+    # for large pasted tool output, which would otherwise stay in the cache
+    if len(text) > ESCAPE_CACHE_MAX_CHARS:
+        return _escape_latex_text(text)
+    return _memoized_escape_latex_text(text)
 
 
 class LatexManager:
@@ -55,46 +152,111 @@ class LatexManager:
         self.latex_files_dir: str = resolve_path(yaml_config.get("latex_files_dir"))
         self.finding_tex_file: str = yaml_config.get("finding_tex_file")
         self.report_tex_file: str = yaml_config.get("report_tex_file")
+        self.full_report_tex_file: str = yaml_config.get(
+            "full_report_tex_file", "report.tex"
+        )
         self.risk_levels: list[str] = yaml_config.get("risk_levels")
         self.impact_levels: list[str] = yaml_config.get("impact_levels")
         self.likelihood_levels: list[str] = yaml_config.get("likelihood_levels")
         self.mitre_techniques_file: str = yaml_config.get("mitre_techniques_file")
-        with open(resolve_path(self.mitre_techniques_file), "r") as file:
-            self.mitre_techniques: list[dict[str, str]] = json.load(file)
-        self.mitre_techniques_dict: dict[str, dict[str, str]] = {
-            technique["id"]: technique for technique in self.mitre_techniques
-        }
+        self.images_dir: str = resolve_path(yaml_config.get("images_dir", "./images"))
+        self.build_cache = BuildCache(
+            resolve_path(yaml_config.get("build_cache_dir", "./build-cache")),
+            yaml_config.get("build_cache_max_entries", 256),
+        )
+        self.build_workers: int = yaml_config.get("build_workers", 2)
+        self.build_timeout: float = yaml_config.get("build_timeout", 60)
+        self.workspace_dir: str = resolve_path(
+            yaml_config.get("workspace_dir", "./build-cache/workspaces")
+        )
+        self.workspace_max_entries: int = yaml_config.get("workspace_max_entries", 512)
+        evidence_cache_dir = yaml_config.get(
+            "evidence_cache_dir", "./build-cache/evidence"
+        )
+        self.evidence_images = EvidenceImages(
+            resolve_path(evidence_cache_dir),
+            self.images_dir,
+            self.build_cache,
+            dpi=yaml_config.get("evidence_dpi", 200),
+            text_width=yaml_config.get("evidence_text_width", 7.5),
+            jpeg_quality=yaml_config.get("evidence_jpeg_quality", 85),
+            workers=self.build_workers,
+        )
+        self.preamble_format = PreambleFormat(
+            self.latex_files_dir,
+            resolve_path(yaml_config.get("format_dir", "./build-cache/format")),
+            self.build_cache,
+            timeout=self.build_timeout,
+        )
+        metrics_file = yaml_config.get("build_metrics_file") or ""
+        self.tracer = BuildTracer(
+            resolve_path(
+                yaml_config.get("build_trace_log", "./build-cache/build-trace.jsonl")
+            ),
+            resolve_path(metrics_file) if metrics_file else "",
+        )
+
+    @property
+    def workspaces(self) -> WorkspaceCache:
+        return get_workspace_cache(
+            cache_dir=self.workspace_dir,
+            latex_dir=self.latex_files_dir,
+            images_dir=self.images_dir,
+            exclude=[os.path.join(self.latex_files_dir, self.finding_tex_file)],
+            build_cache=self.build_cache,
+            max_entries=self.workspace_max_entries,
+        )
+
+    @property
+    def tex_workers(self) -> TexWorkerPool:
+        # started on first use so report builds and the CLI never spawn workers
+        return get_tex_worker_pool(
+            workspaces=self.workspaces,
+            evidence_images=self.evidence_images,
+            report_tex_file=self.report_tex_file,
+            build_cache=self.build_cache,
+            preamble_format=self.preamble_format,
+            tracer=self.tracer,
+            workers=self.build_workers,
+            timeout=self.build_timeout,
+        )
 
     def _escape_latex_special_chars(self, text: str) -> str:
-        return "".join(LATEX_ESCAPE_MAP.get(char, char) for char in text)
+        return escape_latex_special_chars(text)
 
     def escape_latex(self, text: str) -> str:
-        # Escape special LaTeX characters in the given text
-        # anything enclosed in LATEX_SECTION_IDENTIFIER should not be escaped
-        parts = text.split(LATEX_SECTION_IDENTIFIER)
-        if len(parts) % 2 == 0:
-            raise ValueError(
-                "Mismatched LaTeX section identifiers (ensure that all sections are properly closed)."
-            )
-        for i in range(0, len(parts), 2):
-            parts[i] = self._escape_latex_special_chars(parts[i])
-        return "".join(parts)
+        with span("escape"):
+            return escape_latex_text(text)
 
-    def convert_scope_to_latex(self, scope: list[MachineScope]) -> str:
-        latex_scope = r"\begin{tabularx}{\dimexpr\textwidth-1cm}{p{8cm}XX}"
-        latex_scope += "\n\\arrayrulecolor{gray}"
+    def scope_table_rows(self, scope: list[MachineScope]) -> list[list[tuple[str, str, str]]]:
+        # (host, service, port) rows grouped per machine, shared by the LaTeX
+        # and HTML renderers; a machine without ip or name has no first row
+        groups = []
         for machine in scope:
             services = machine.services
             if len(services) == 0:
-                services = [{"name": "N/A", "port": "N/A"}]
+                services = [("N/A", "N/A")]
+            rows = []
             if machine.ip and machine.name:
-                latex_scope += f"{machine.ip} ({machine.name}) & {services[0]['name']} & {services[0]['port']} \\\\\n"
+                rows.append((f"{machine.ip} ({machine.name})", *services[0]))
             elif machine.ip:
-                latex_scope += f"{machine.ip} & {services[0]['name']} & {services[0]['port']} \\\\\n"
+                rows.append((machine.ip, *services[0]))
             elif machine.name:
-                latex_scope += f"{machine.name} & {services[0]['name']} & {services[0]['port']} \\\\\n"
-            for service in services[1:]:
-                latex_scope += f" & {service['name']} & {service['port']} \\\\\n"
+                rows.append((machine.name, *services[0]))
+            for name, port in services[1:]:
+                rows.append(("", name, port))
+            groups.append(rows)
+        return groups
+
+    def convert_scope_to_latex(self, scope: list[MachineScope]) -> str:
+        latex_scope = r"\begin{tabularx}{\dimexpr\textwidth-1cm}{p{8cm}XX}"
+        latex_scope += "\n\\arrayrulecolor{gray}"
+        for rows in self.scope_table_rows(scope):
+            for host, name, port in rows:
+                if host:
+                    latex_scope += f"{host} & {name} & {port} \\\\\n"
+                else:
+                    latex_scope += f" & {name} & {port} \\\\\n"
             latex_scope += r"\hline" + "\n"
         latex_scope += r"\end{tabularx}"
         return latex_scope
@@ -124,10 +286,12 @@ class LatexManager:
         return latex_references
 
     def calculate_cvss_score(self, cvss_vector: str) -> str:
+        if cvss_vector == "N/A":
+            return "N/A"
         try:
-            cvss = CVSS4(cvss_vector)
-            return f"{cvss.scores()[0]:.1f}"
-        except Exception:
+            return f"{cvss_base_score(cvss_vector):.1f}"
+        except ValueError as e:
+            print(f"Warning: {e}")
             return "N/A"
 
     def convert_cvss_vector_to_latex(self, cvss_vector: str) -> str:
@@ -135,30 +299,34 @@ class LatexManager:
             return "N/A"
         return cvss_vector[:33] + r"\\" + cvss_vector[33:]
 
-    def generate_cvss_vector_str(self, cvss_vector: dict[str, str]) -> str:
-        return (
-            (
-                "CVSS:4.0/"
-                + "/".join(f"{key}:{value}" for key, value in cvss_vector.items())
-            )
-            if all(cvss_vector.values())
-            else "N/A"
-        )
+    def generate_cvss_vector_str(self, cvss_vector: CvssVector) -> str:
+        return format_cvss_vector(cvss_vector)
+
+    def resolve_mitre_technique(
+        self, mitre_index: MitreIndex, tid: str
+    ) -> tuple[str, str] | None:
+        # (name, url) for a technique id, None if it is not in the index
+        technique = mitre_index.get(tid)
+        if not technique:
+            return None
+        name = technique.get("name")
+        url = technique.get("url")
+        if not url or not url.startswith("http"):
+            print(f"Warning: Invalid or missing URL for technique {tid}")
+            name = "N/A"
+            url = f"https://attack.mitre.org/techniques/{tid}/"
+        return name, url
 
     def convert_mitre_techniques_to_latex(self, mitre_techniques: list[str]) -> str:
         if not mitre_techniques:
             return "N/A" + r"\\"
+        mitre_index = get_mitre_index(resolve_path(self.mitre_techniques_file))
         latex_mitre = r"\begin{tabularx}{\textwidth}{XX}" + "\n"
         for i, tid in enumerate(mitre_techniques):
-            technique = self.mitre_techniques_dict.get(tid)
+            technique = self.resolve_mitre_technique(mitre_index, tid)
             if not technique:
                 continue
-            name = technique.get("name")
-            url = technique.get("url")
-            if not url or not url.startswith("http"):
-                print(f"Warning: Invalid or missing URL for technique {tid}")
-                name = "N/A"
-                url = f"https://attack.mitre.org/techniques/{tid}/"
+            name, url = technique
             latex_mitre += f"\\href{{{url}}}{{{tid}}} - {name} "
             if i % 2 == 0:
                 latex_mitre += "& "
@@ -170,9 +338,14 @@ class LatexManager:
         return latex_mitre
 
     def convert_finding_to_latex(self, number: str, finding: Finding) -> str:
+        with span("latex_generation"):
+            return self._convert_finding_to_latex(number, finding)
+
+    def _convert_finding_to_latex(self, number: str, finding: Finding) -> str:
         cvss_vector_str = self.generate_cvss_vector_str(finding.cvss_vector)
         return FINDING_TEMPLATE.format(
             number=number,
+            label=finding_label(finding.id),
             title=self.escape_latex(finding.title.strip()),
             category=finding.risk + 1,
             risk=self.risk_levels[finding.risk].upper(),
@@ -189,72 +362,216 @@ class LatexManager:
             references=self.convert_references_to_latex(finding.references),
         )
 
+    def tex_pdf_cache_key(self, tex_file: str, files: dict[str, str]) -> str:
+        finding_tex_path = os.path.join(self.latex_files_dir, self.finding_tex_file)
+        content = tex_file + "\n" + self.evidence_images.settings + "\n"
+        content += "\n".join(
+            f"{name}\n{text}" for name, text in sorted(files.items())
+        )
+        return self.build_cache.key(
+            content,
+            self.latex_files_dir,
+            self.images_dir,
+            exclude=[finding_tex_path],
+        )
+
+    def build_tex_pdf(
+        self,
+        tex_file: str,
+        files: dict[str, str],
+        output_file: str,
+        use_format: bool = True,
+        use_cache: bool = True,
+        kind: str = "document",
+    ) -> tuple[bool, str]:
+        trace = self.tracer.start(kind, tex_file=tex_file, output_file=output_file)
+        cache_key = ""
+        if use_cache:
+            with activate(trace), span("cache_lookup"):
+                cache_key = self.tex_pdf_cache_key(tex_file, files)
+                hit = self.build_cache.get(cache_key, output_file)
+            if hit:
+                self.tracer.finish(trace, "cache_hit")
+                return True, ""
+        return self._compile_tex_pdf(
+            tex_file, files, output_file, cache_key, trace, use_format
+        )
+
+    def submit_single_finding_pdf(
+        self, finding: Finding, output_file: str
+    ) -> Future[tuple[bool, str]]:
+        future: Future[tuple[bool, str]] = Future()
+        trace = self.tracer.start(
+            "single_finding", finding_id=finding.id, output_file=output_file
+        )
+        with activate(trace):
+            try:
+                latex_content = self.convert_finding_to_latex("1.2.3", finding)
+            except Exception as e:
+                self.tracer.finish(trace, "failed", str(e))
+                future.set_result((False, str(e)))
+                return future
+            files = {self.finding_tex_file: latex_content}
+            with span("cache_lookup"):
+                cache_key = self.tex_pdf_cache_key(self.report_tex_file, files)
+                hit = self.build_cache.get(cache_key, output_file)
+        if hit:
+            print(f"Build cache hit for {output_file}")
+            self.tracer.finish(trace, "cache_hit")
+            future.set_result((True, ""))
+            return future
+        return self.tex_workers.submit(
+            finding.id, self.report_tex_file, files, output_file, cache_key, trace
+        )
+
     def generate_single_finding_pdf(
         self, finding: Finding, output_file: str
     ) -> tuple[bool, str]:
-        try:
-            latex_content = self.convert_finding_to_latex("1.2.3", finding)
-        except Exception as e:
-            return False, str(e)
+        return self.submit_single_finding_pdf(finding, output_file).result()
+
+    def _compile_tex_pdf(
+        self,
+        tex_file: str,
+        files: dict[str, str],
+        output_file: str,
+        cache_key: str,
+        trace: BuildTrace,
+        use_format: bool = True,
+    ) -> tuple[bool, str]:
+        with activate(trace):
+            try:
+                success, error = self._run_latexmk(
+                    tex_file, files, output_file, cache_key, trace, use_format
+                )
+            except Exception as e:
+                self.tracer.finish(trace, "failed", str(e))
+                raise
+        self.tracer.finish(trace, "ok" if success else "failed", error)
+        return success, error
+
+    def _run_latexmk(
+        self,
+        tex_file: str,
+        files: dict[str, str],
+        output_file: str,
+        cache_key: str,
+        trace: BuildTrace,
+        use_format: bool,
+    ) -> tuple[bool, str]:
         finding_tex_path = os.path.join(self.latex_files_dir, self.finding_tex_file)
-        with open(finding_tex_path, "w") as file:
-            file.write(latex_content)
-        report_tex_path = os.path.join(self.latex_files_dir, self.report_tex_file)
-        command = f'latexmk -cd -pdf -latexoption="--halt-on-error" {report_tex_path}'
-        print(f"Running command: {command}")
-        # run latexmk and capture stderr so we can return it on failure
-        result = subprocess.run(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-        if result.returncode != 0:
-            stderr = (
-                (result.stdout or "").strip() + "\n" + (result.stderr or "").strip()
-            )
-            return False, stderr
-        generated_pdf = report_tex_path.replace(".tex", ".pdf")
-        if os.path.exists(output_file):
-            os.remove(output_file)
-        os.rename(generated_pdf, output_file)
-        subprocess.run(
-            f"latexmk -C -cd {os.path.join(self.latex_files_dir, '*.tex')}",
-            shell=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+        # each document keeps its workspace between builds so latexmk finds
+        # the aux and fdb_latexmk files of the last run and can skip passes
+        with self.workspaces.checkout(os.path.splitext(tex_file)[0]) as workspace:
+            for filename, content in files.items():
+                workspace.write(filename, content)
+            self.evidence_images.prepare(workspace.root, files.values())
+            tex_path = workspace.path(tex_file)
+            command = f'latexmk -cd -pdf -latexoption="--halt-on-error" {tex_path}'
+            # reuse the dumped preamble when available, otherwise compile from scratch
+            with span("format"):
+                use_format = use_format and self.preamble_format.ensure(
+                    self.report_tex_file, exclude=[finding_tex_path]
+                )
+            if use_format:
+                command += f' -pdflatex="{self.preamble_format.pdflatex_command()}"'
+            print(f"Running command: {command}")
+            # stream latexmk's output to time each pass; stderr is merged so
+            # the whole log can be returned on failure
+            with span("latexmk"):
+                # latexmk runs in its own process group so the watchdog can
+                # kill the shell, latexmk and pdflatex together
+                process = subprocess.Popen(
+                    command,
+                    shell=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    env=self.preamble_format.env(),
+                    start_new_session=True,
+                )
+                timed_out = threading.Event()
+                watchdog = threading.Timer(
+                    self.build_timeout, kill_process_group, (process, timed_out)
+                )
+                watchdog.start()
+                passes = LatexmkPassTimer()
+                output = []
+                try:
+                    for line in process.stdout:
+                        output.append(line)
+                        passes.feed(line)
+                    process.wait()
+                finally:
+                    watchdog.cancel()
+                trace.passes += passes.finish()
+            if timed_out.is_set():
+                # a killed build may have left any file half-written
+                workspace.remove()
+                return False, f"latexmk timed out after {self.build_timeout}s"
+            if process.returncode != 0:
+                workspace.clean()
+                return False, "".join(output).strip()
+            generated_pdf = tex_path.replace(".tex", ".pdf")
+            if cache_key:
+                with span("cache_store"):
+                    self.build_cache.put(cache_key, generated_pdf)
+            with span("copy_output"):
+                copy_file_atomic(generated_pdf, output_file)
         return True, ""
 
+    def finding_sort_key(self, finding: Finding) -> tuple[int, int, int, str]:
+        return (-finding.risk, -finding.impact, -finding.likelihood, finding.title)
+
     def sort_findings(self, findings: list[Finding]) -> list[Finding]:
-        return sorted(
-            findings,
-            key=lambda f: (-f.risk, -f.impact, -f.likelihood, f.title),
-            reverse=False,
-        )
+        return sorted(findings, key=self.finding_sort_key)
 
-    def generate_report_latex(self, findings: list[Finding]) -> str:
-        sorted_findings = self.sort_findings(findings)
-        finding_latex = []
-        for i, finding in enumerate(sorted_findings, start=1):
-            finding_number = f"{i}"
+    def iter_sorted_finding_files(self, findings_folder: str) -> Iterator[Finding]:
+        # only (sort key, path) pairs are kept in memory; each finding is parsed
+        # again right before it is rendered and dropped afterwards
+        index: list[tuple[tuple[int, int, int, str], str]] = []
+        for path in iter_finding_files(findings_folder):
             try:
-                temp = self.convert_finding_to_latex(finding_number, finding)
+                with span("load_json"):
+                    finding = load_finding_file(path)
             except Exception as e:
-                print(f"Error converting finding {finding_number}: {e}")
+                print(f"Error loading finding from {path}: {e}")
+                continue
+            index.append((self.finding_sort_key(finding), path))
+        index.sort()
+        for _, path in index:
+            try:
+                with span("load_json"):
+                    finding = load_finding_file(path)
+            except Exception as e:
+                print(f"Error loading finding from {path}: {e}")
                 continue
-            finding_latex.append(temp)
+            yield finding
 
-        final_latex = "\\section{Findings}\n"
+    def write_report_latex(self, findings: Iterable[Finding], file: TextIO) -> int:
+        # findings must already be sorted; each \vulnreport is written as soon
+        # as it is rendered so nothing accumulates in memory
+        file.write("\\section{Findings}\n")
         current_risk = -1
-        for flatex, finding in zip(finding_latex, sorted_findings):
+        written = 0
+        for i, finding in enumerate(findings, start=1):
+            finding_number = f"{i}"
+            try:
+                flatex = self.convert_finding_to_latex(finding_number, finding)
+            except Exception as e:
+                print(f"Error converting finding {finding_number}: {e}")
+                continue
             if finding.risk != current_risk:
                 current_risk = finding.risk
                 risk_level = self.risk_levels[current_risk].title()
-                final_latex += f"\\subsection{{{risk_level} Risk Findings}}\n"
-            final_latex += flatex + "\n\n"
-        return final_latex
+                file.write(f"\\subsection{{{risk_level} Risk Findings}}\n")
+            file.write(flatex + "\n\n")
+            written += 1
+        return written
+
+    def generate_report_latex(self, findings: list[Finding]) -> str:
+        buffer = io.StringIO()
+        self.write_report_latex(self.sort_findings(findings), buffer)
+        return buffer.getvalue()
 
 
 if __name__ == "__main__":
@@ -266,21 +583,13 @@ if __name__ == "__main__":
     )
     parser.add_argument("output_file", help="Path to output LaTeX file.")
     args = parser.parse_args()
-    findings_folder = args.findings_folder
-    output_file = args.output_file
-    json_files = [x for x in os.listdir(findings_folder) if x.endswith(".json")]
-    parsed_findings: list[Finding] = []
-    for jf in json_files:
-        jf_full_path = os.path.abspath(os.path.join(findings_folder, jf))
-        try:
-            with open(jf_full_path, "r") as file:
-                finding_data = json.load(file)
-            finding = Finding.build_from_json(jf.split(".")[0], finding_data)
-        except Exception as e:
-            print(f"Error loading finding from {jf_full_path}: {e}")
-            continue
-        parsed_findings.append(finding)
     latex_manager = LatexManager()
-    report_latex = latex_manager.generate_report_latex(parsed_findings)
-    with open(output_file, "w") as file:
-        file.write(report_latex)
+    trace = latex_manager.tracer.start(
+        "report_latex", findings_folder=args.findings_folder
+    )
+    with activate(trace), open(args.output_file, "w") as file:
+        written = latex_manager.write_report_latex(
+            latex_manager.iter_sorted_finding_files(args.findings_folder), file
+        )
+    trace.attributes["findings"] = written
+    latex_manager.tracer.finish(trace, "ok")
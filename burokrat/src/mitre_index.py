@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+
+
+class MitreIndex:
+    # parallel lists sorted by technique id; lookups are a binary search
+    ids: list[str]
+    names: list[str]
+    urls: list[str]
+    mtime_ns: int
+
+    def __init__(
+        self, ids: list[str], names: list[str], urls: list[str], mtime_ns: int
+    ):
+        self.ids = ids
+        self.names = names
+        self.urls = urls
+        self.mtime_ns = mtime_ns
+
+    @staticmethod
+    def build_from_file(path: str) -> "MitreIndex":
+        mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, "r") as f:
+            techniques = json.load(f)
+        techniques.sort(key=lambda t: t["id"])
+        return MitreIndex(
+            [t["id"] for t in techniques],
+            [t.get("name", "") for t in techniques],
+            [t.get("url", "") for t in techniques],
+            mtime_ns,
+        )
+
+    def _position(self, tid: str) -> int:
+        i = bisect_left(self.ids, tid)
+        if i < len(self.ids) and self.ids[i] == tid:
+            return i
+        return -1
+
+    def __contains__(self, tid: str) -> bool:
+        return self._position(tid) >= 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, tid: str) -> dict[str, str] | None:
+        i = self._position(tid)
+        if i < 0:
+            return None
+        return {"id": self.ids[i], "name": self.names[i], "url": self.urls[i]}
+
+    def name(self, tid: str, default: str = "") -> str:
+        i = self._position(tid)
+        return self.names[i] if i >= 0 else default
+
+
+_indexes: dict[str, MitreIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_mitre_index(path: str) -> MitreIndex:
+    # one index per file shared by every session in the process, reloaded when
+    # the file's mtime changes (e.g. after running sync_mitre.py)
+    path = os.path.abspath(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    index = _indexes.get(path)
+    if index is not None and index.mtime_ns == mtime_ns:
+        return index
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None or index.mtime_ns != mtime_ns:
+            index = MitreIndex.build_from_file(path)
+            _indexes[path] = index
+    return index
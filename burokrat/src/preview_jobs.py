@@ -0,0 +1,99 @@
+import os
+import threading
+import uuid
+from concurrent.futures import Future
+from util import *
+from latex_manager import LatexManager
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class PreviewJob:
+    finding_id: str
+    generation: int
+    output_file: str
+    tmp_output_file: str
+    error_message: str
+    future: Future[tuple[bool, str]] | None
+
+    def __init__(self, finding_id: str, generation: int, output_file: str):
+        self.finding_id = finding_id
+        self.generation = generation
+        self.output_file = output_file
+        # every session numbers its generations from 1, so the name has to be
+        # unique on its own for two sessions building the same finding
+        self.tmp_output_file = f"{output_file}.{uuid.uuid4().hex}.tmp"
+        self.error_message = ""
+        self.future = None
+        # set once the PDF has been moved into place (or the build failed)
+        self.result_status = ""
+
+    @property
+    def status(self) -> str:
+        if self.result_status:
+            return self.result_status
+        if self.future is not None and self.future.running():
+            return JOB_RUNNING
+        return JOB_QUEUED
+
+    @property
+    def pending(self) -> bool:
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+
+class PreviewJobQueue:
+    # Tracks the latest preview build per finding. A newer request supersedes
+    # the previous one: a queued build is cancelled and a running one is left to
+    # finish but its PDF is discarded instead of replacing the newer preview.
+    def __init__(self, latex_manager: LatexManager):
+        self.latex_manager = latex_manager
+        self.jobs: dict[str, PreviewJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, finding: Finding, output_file: str) -> PreviewJob:
+        # build from a snapshot so edits made while queued don't leak into it
+        snapshot = Finding.build_from_json(finding.id, finding.to_json())
+        with self._lock:
+            previous = self.jobs.get(finding.id)
+            generation = previous.generation + 1 if previous else 1
+            if previous and previous.future is not None:
+                previous.future.cancel()
+            job = PreviewJob(finding.id, generation, output_file)
+            self.jobs[finding.id] = job
+        job.future = self.latex_manager.submit_single_finding_pdf(
+            snapshot, job.tmp_output_file
+        )
+        job.future.add_done_callback(lambda _: self._finish(job))
+        return job
+
+    def _finish(self, job: PreviewJob):
+        if job.future.cancelled():
+            job.error_message = "Superseded by a newer build"
+            job.result_status = JOB_FAILED
+            return
+        success, error_message = False, ""
+        try:
+            success, error_message = job.future.result()
+            with self._lock:
+                if success and self.jobs.get(job.finding_id) is job:
+                    os.replace(job.tmp_output_file, job.output_file)
+        except Exception as e:
+            success, error_message = False, str(e)
+        finally:
+            # always settle the job, or the GUI would poll it forever
+            job.error_message = error_message
+            job.result_status = JOB_DONE if success else JOB_FAILED
+            if os.path.exists(job.tmp_output_file):
+                os.remove(job.tmp_output_file)
+
+    def get(self, finding_id: str) -> PreviewJob | None:
+        return self.jobs.get(finding_id)
+
+    def has_pending(self, finding_id: str | None = None) -> bool:
+        if finding_id is not None:
+            job = self.jobs.get(finding_id)
+            return job is not None and job.pending
+        return any(job.pending for job in list(self.jobs.values()))
@@ -0,0 +1,399 @@
+import argparse
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from util import *
+from latex_manager import LatexManager, finding_label
+from build_trace import activate, span
+
+FINDINGS_SECTION = "sections/findings"
+INCLUDE_PATTERN = re.compile(r"\\include\{([^{}]+)\}")
+SECTION_PATTERN = re.compile(r"\\section\*?\{")
+FIGURE_PATTERN = re.compile(r"\\evidence\{([^{}]*)\}|\\placeholder\{|\\begin\{figure\}")
+REF_PATTERN = re.compile(r"\\(?:ref|pageref|autoref|nameref)\*?\{([^{}]+)\}")
+NEWLABEL_PATTERN = re.compile(r"^\\newlabel\{([^{}]+)\}\{(.*)\}$", re.MULTILINE)
+MASTER_TEX_FILE = "report-master.tex"
+
+FINDING_PAGE_TEMPLATE = """\\documentclass{{article}}
+\\input{{report_initialization}}
+
+\\begin{{document}}
+{labels}
+\\pagestyle{{empty}}
+{headings}
+\\setcounter{{subsubsection}}{{{subsubsection}}}
+\\setcounter{{figure}}{{{figure}}}
+{finding}
+\\end{{document}}
+"""
+
+
+def define_labels(labels: dict[str, str]) -> str:
+    return "\n".join(
+        f"\\newlabel{{{label}}}{{{value}}}" for label, value in sorted(labels.items())
+    )
+
+
+class FindingPage:
+    finding: Finding
+    latex: str
+    section: int
+    subsection: int
+    subsubsection: int
+    figure: int
+    new_section: bool
+    new_subsection: bool
+    pdf_file: str
+    labels: dict[str, str]
+    external_labels: dict[str, str]
+
+    def __init__(self, finding: Finding, latex: str):
+        self.finding = finding
+        self.latex = latex
+        self.section = 0
+        self.subsection = 0
+        self.subsubsection = 0
+        self.figure = 0
+        self.new_section = False
+        self.new_subsection = False
+        self.pdf_file = ""
+        # \newlabel values of the figures on this page, and of the labels
+        # defined elsewhere in the report that this page references
+        self.labels = {}
+        self.external_labels = {}
+
+
+class ReportBuilder:
+    # Compiles the full report as one document, with the findings written in
+    # place of sections/findings the same way latex_manager.py lays them out.
+    def __init__(self, latex_manager: LatexManager):
+        self.latex_manager = latex_manager
+        self.jobs = 1
+
+    def _report_tex(self) -> str:
+        with open(
+            os.path.join(
+                self.latex_manager.latex_files_dir,
+                self.latex_manager.full_report_tex_file,
+            ),
+            "r",
+        ) as file:
+            return file.read()
+
+    def report_document(self, report_tex: str, findings: list[Finding]) -> str:
+        # the \clearpages stand in for the ones \include adds around the section
+        return report_tex.replace(
+            f"\\include{{{FINDINGS_SECTION}}}",
+            "\\clearpage\n"
+            + self.latex_manager.generate_report_latex(findings)
+            + "\\clearpage\n",
+            1,
+        )
+
+    def build(self, findings: list[Finding], output_pdf: str) -> tuple[bool, str]:
+        tracer = self.latex_manager.tracer
+        trace = tracer.start(
+            "report", findings=len(findings), jobs=self.jobs, output_file=output_pdf
+        )
+        with activate(trace):
+            success, message = self._build(findings, output_pdf)
+        tracer.finish(trace, "ok" if success else "failed", message)
+        return success, message
+
+    def _build(self, findings: list[Finding], output_pdf: str) -> tuple[bool, str]:
+        with span("layout"):
+            document = self.report_document(self._report_tex(), findings)
+        return self._build_master(document, output_pdf)
+
+    def _build_master(self, document: str, output_pdf: str) -> tuple[bool, str]:
+        # neither the generated sections (overview stats, affected assets) nor
+        # the spliced page PDFs are part of the cache key; always rebuild it
+        with span("master"):
+            return self.latex_manager.build_tex_pdf(
+                MASTER_TEX_FILE,
+                {MASTER_TEX_FILE: document},
+                output_pdf,
+                use_format=False,
+                use_cache=False,
+                kind="report_master",
+            )
+
+
+class ParallelReportBuilder(ReportBuilder):
+    # Compiles every finding as its own small document in parallel and splices
+    # the resulting pages into the full report with pdfpages. Section, figure
+    # and finding counters are seeded per page so numbering matches the
+    # monolithic report, and unchanged pages come straight from the build cache.
+    # Since every page is its own document, labels are passed around by hand:
+    # the evidence figures' labels are worked out from the layout and defined
+    # in the pages and the master that reference them, and the labels of the
+    # master (front matter and appendix) are read from its aux files.
+    # pdfpages drops the links inside the spliced pages, and every finding
+    # starts on a new page, so this mode is opt-in (--parallel).
+    def __init__(self, latex_manager: LatexManager, jobs: int):
+        super().__init__(latex_manager)
+        self.jobs = jobs
+
+    def _sections_before_findings(self, report_tex: str) -> int:
+        count = 0
+        for include in INCLUDE_PATTERN.findall(report_tex):
+            if include == FINDINGS_SECTION:
+                break
+            section_path = os.path.join(
+                self.latex_manager.latex_files_dir, include + ".tex"
+            )
+            if os.path.exists(section_path):
+                with open(section_path, "r") as file:
+                    count += len(SECTION_PATTERN.findall(file.read()))
+        return count
+
+    def layout_pages(
+        self, findings: list[Finding], preceding_sections: int
+    ) -> list[FindingPage]:
+        pages = []
+        figure = 0
+        subsection = 0
+        subsubsection = 0
+        current_risk = -1
+        for finding in self.latex_manager.sort_findings(findings):
+            try:
+                latex = self.latex_manager.convert_finding_to_latex(
+                    str(len(pages) + 1), finding
+                )
+            except Exception as e:
+                print(f"Error converting finding {finding.id}: {e}")
+                continue
+            page = FindingPage(finding, latex)
+            page.section = preceding_sections
+            page.new_section = len(pages) == 0
+            if finding.risk != current_risk:
+                current_risk = finding.risk
+                page.new_subsection = True
+                subsection += 1
+                subsubsection = 0
+            page.subsection = subsection
+            page.subsubsection = subsubsection
+            page.figure = figure
+            # the heading number \vulnreport prints, see page_document()
+            page.labels[finding_label(finding.id)] = (
+                f"{{{preceding_sections + 1}.{subsection}.{subsubsection + 1}}}"
+                "{}{}{}{}"
+            )
+            for i, match in enumerate(FIGURE_PATTERN.finditer(latex), start=1):
+                if match.group(1) is not None:
+                    page.labels[f"fig:{match.group(1)}"] = (
+                        f"{{{figure + i}}}{{}}{{}}{{}}{{}}"
+                    )
+            subsubsection += 1
+            figure += len(FIGURE_PATTERN.findall(latex))
+            pages.append(page)
+        return pages
+
+    def page_document(self, page: FindingPage) -> str:
+        headings = []
+        if page.new_section:
+            headings.append(f"\\setcounter{{section}}{{{page.section}}}")
+            headings.append("\\section{Findings}")
+        else:
+            headings.append(f"\\setcounter{{section}}{{{page.section + 1}}}")
+        if page.new_subsection:
+            risk_level = self.latex_manager.risk_levels[page.finding.risk].title()
+            headings.append(f"\\setcounter{{subsection}}{{{page.subsection - 1}}}")
+            headings.append(f"\\subsection{{{risk_level} Risk Findings}}")
+        else:
+            headings.append(f"\\setcounter{{subsection}}{{{page.subsection}}}")
+        return FINDING_PAGE_TEMPLATE.format(
+            labels=define_labels(page.external_labels),
+            headings="\n".join(headings),
+            subsubsection=page.subsubsection,
+            figure=page.figure,
+            finding=page.latex,
+        )
+
+    @staticmethod
+    def figure_labels(pages: list[FindingPage]) -> dict[str, str]:
+        # an image shown by several findings is cited by its first figure
+        labels: dict[str, str] = {}
+        for page in pages:
+            for label, value in page.labels.items():
+                labels.setdefault(label, value)
+        return labels
+
+    @staticmethod
+    def external_labels(
+        page: FindingPage, known_labels: dict[str, str]
+    ) -> dict[str, str]:
+        # only the referenced labels go into the page, so its cache key
+        # changes when one of them moves and not for every other edit
+        return {
+            label: known_labels[label]
+            for label in REF_PATTERN.findall(page.latex)
+            if label in known_labels and label not in page.labels
+        }
+
+    def master_labels(self) -> dict[str, str]:
+        # labels of the last master build; the aux files stay in its workspace
+        labels = {}
+        with self.latex_manager.workspaces.checkout(
+            os.path.splitext(MASTER_TEX_FILE)[0]
+        ) as workspace:
+            for root, _, filenames in os.walk(workspace.tex_dir):
+                for filename in sorted(filenames):
+                    if not filename.endswith(".aux"):
+                        continue
+                    with open(os.path.join(root, filename), "r") as file:
+                        labels.update(NEWLABEL_PATTERN.findall(file.read()))
+        return labels
+
+    def _build_pages(
+        self, pages: list[FindingPage], pages_dir: str
+    ) -> tuple[bool, str]:
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(
+                pool.map(lambda page: self._build_page(page, pages_dir), pages)
+            )
+        errors = [
+            f"{page.finding.id}: {message}"
+            for page, (success, message) in zip(pages, results)
+            if not success
+        ]
+        return not errors, "\n\n".join(errors)
+
+    def _build_page(self, page: FindingPage, pages_dir: str) -> tuple[bool, str]:
+        page.pdf_file = os.path.join(pages_dir, f"{page.finding.id}.pdf")
+        tex_file = f"page-{page.finding.id}.tex"
+        return self.latex_manager.build_tex_pdf(
+            tex_file,
+            {tex_file: self.page_document(page)},
+            page.pdf_file,
+            kind="report_page",
+        )
+
+    def splice_latex(self, pages: list[FindingPage]) -> str:
+        latex = ""
+        for page in pages:
+            toc = []
+            if page.new_section:
+                toc.append("1,section,1,{Findings},sec:findings")
+            if page.new_subsection:
+                risk_level = self.latex_manager.risk_levels[page.finding.risk].title()
+                toc.append(
+                    f"1,subsection,2,{{{risk_level} Risk Findings}},"
+                    f"sec:findings-{risk_level.lower()}"
+                )
+            title = self.latex_manager.escape_latex(page.finding.title.strip())
+            toc.append(f"1,subsubsection,3,{{{title}}},finding:{page.finding.id}")
+            latex += (
+                f"\\includepdf[pages=-, pagecommand={{}}, addtotoc={{{','.join(toc)}}}]"
+                f"{{{page.pdf_file}}}\n"
+            )
+        if pages:
+            last = pages[-1]
+            figures = last.figure + len(FIGURE_PATTERN.findall(last.latex))
+            latex += f"\\setcounter{{section}}{{{last.section + 1}}}\n"
+            latex += f"\\setcounter{{figure}}{{{figures}}}\n"
+        return latex
+
+    def master_document(self, report_tex: str, pages: list[FindingPage]) -> str:
+        report_tex = report_tex.replace(
+            "\\input{report_initialization}",
+            "\\input{report_initialization}\n\\usepackage{pdfpages}",
+            1,
+        )
+        report_tex = report_tex.replace(
+            "\\begin{document}",
+            "\\begin{document}\n" + define_labels(self.figure_labels(pages)),
+            1,
+        )
+        return report_tex.replace(
+            f"\\include{{{FINDINGS_SECTION}}}",
+            "\\clearpage\n" + self.splice_latex(pages),
+            1,
+        )
+
+    def _build(self, findings: list[Finding], output_pdf: str) -> tuple[bool, str]:
+        report_tex = self._report_tex()
+        with span("layout"):
+            pages = self.layout_pages(
+                findings, self._sections_before_findings(report_tex)
+            )
+        figure_labels = self.figure_labels(pages)
+        master_labels = self.master_labels()
+        for page in pages:
+            page.external_labels = self.external_labels(
+                page, {**master_labels, **figure_labels}
+            )
+        with tempfile.TemporaryDirectory(prefix="burokrat-pages-") as pages_dir:
+            start = time.perf_counter()
+            with span("pages"):
+                success, message = self._build_pages(pages, pages_dir)
+            if not success:
+                return False, message
+            print(
+                f"Built {len(pages)} finding pages with {self.jobs} jobs "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+            success, message = self._build_master(
+                self.master_document(report_tex, pages), output_pdf
+            )
+            if not success:
+                return False, message
+            # a page citing a front matter or appendix label that was new or
+            # moved in this master build is rebuilt once with the new value
+            master_labels = self.master_labels()
+            stale = []
+            for page in pages:
+                labels = self.external_labels(page, {**master_labels, **figure_labels})
+                if labels != page.external_labels:
+                    page.external_labels = labels
+                    stale.append(page)
+            if not stale:
+                return True, ""
+            with span("pages"):
+                success, message = self._build_pages(stale, pages_dir)
+            if not success:
+                return False, message
+            return self._build_master(
+                self.master_document(report_tex, pages), output_pdf
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile the full report PDF from a folder of findings."
+    )
+    parser.add_argument(
+        "findings_folder", help="Path to folder containing JSON findings."
+    )
+    parser.add_argument("output_file", help="Path to output PDF file.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of finding pages to compile at once with --parallel.",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Compile every finding as its own document and splice the pages "
+        "together. Faster for large reports, but the links inside findings "
+        "are lost and every finding starts on a new page.",
+    )
+    args = parser.parse_args()
+    parsed_findings: list[Finding] = []
+    for path in iter_finding_files(args.findings_folder):
+        try:
+            parsed_findings.append(load_finding_file(path))
+        except Exception as e:
+            print(f"Error loading finding from {path}: {e}")
+    if args.parallel:
+        builder = ParallelReportBuilder(LatexManager(), args.jobs)
+    else:
+        builder = ReportBuilder(LatexManager())
+    success, message = builder.build(parsed_findings, os.path.abspath(args.output_file))
+    if not success:
+        print(message)
+        raise SystemExit(1)
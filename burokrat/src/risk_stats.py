@@ -0,0 +1,226 @@
+import argparse
+import numpy as np
+from util import *
+from cvss_score import cvss_base_score, format_cvss_vector
+from latex_manager import LatexManager, escape_latex_special_chars
+
+CVSS_BINS = np.array([0.0, 0.1, 4.0, 7.0, 9.0, 10.01])
+CVSS_BIN_LABELS = ["None", "Low", "Medium", "High", "Critical"]
+CVSS_METRICS = list(CVSS_SECTIONS.keys())
+HEATMAP_COLORS = ["lowbg", "mediumbg", "highbg", "criticalbg"]
+
+
+class RiskStats:
+    # All per-finding values are packed into flat arrays once; every statistic
+    # below is then a single vectorized pass over those arrays.
+    risk: np.ndarray
+    impact: np.ndarray
+    likelihood: np.ndarray
+    cvss_codes: np.ndarray
+    cvss_scores: np.ndarray
+    hosts: list[str]
+    host_finding: np.ndarray
+    host_index: np.ndarray
+
+    def __init__(self, risk_levels, impact_levels, likelihood_levels):
+        self.risk_levels: list[str] = risk_levels
+        self.impact_levels: list[str] = impact_levels
+        self.likelihood_levels: list[str] = likelihood_levels
+
+    @staticmethod
+    def build_from_findings(
+        findings: list[Finding],
+        risk_levels: list[str],
+        impact_levels: list[str],
+        likelihood_levels: list[str],
+    ) -> "RiskStats":
+        stats = RiskStats(risk_levels, impact_levels, likelihood_levels)
+        n = len(findings)
+        stats.risk = np.fromiter((f.risk for f in findings), np.int8, n)
+        stats.impact = np.fromiter((f.impact for f in findings), np.int8, n)
+        stats.likelihood = np.fromiter((f.likelihood for f in findings), np.int8, n)
+
+        # metric value codes as indexes into CVSS_SECTIONS values, -1 if unset;
+        # CvssVector already stores exactly these, so the bytes are copied as is
+        stats.cvss_codes = np.frombuffer(
+            b"".join(f.cvss_vector.codes.tobytes() for f in findings), dtype=np.int8
+        ).reshape(n, len(CVSS_METRICS))
+
+        # score each distinct vector once and broadcast back to the findings
+        vectors = np.array([format_cvss_vector(f.cvss_vector) for f in findings])
+        unique_vectors, inverse = np.unique(vectors, return_inverse=True)
+        unique_scores = np.full(len(unique_vectors), np.nan)
+        for i, vector in enumerate(unique_vectors):
+            if vector == "N/A":
+                continue
+            try:
+                unique_scores[i] = cvss_base_score(str(vector))
+            except ValueError as e:
+                print(f"Warning: {e}")
+        stats.cvss_scores = unique_scores[inverse].reshape(n)
+
+        host_names = []
+        host_finding = []
+        for i, finding in enumerate(findings):
+            for machine in finding.scope:
+                host = machine.ip.strip() or machine.name.strip()
+                if host:
+                    host_names.append(host)
+                    host_finding.append(i)
+        hosts, host_index = np.unique(
+            np.array(host_names, dtype=str), return_inverse=True
+        )
+        stats.hosts = [str(x) for x in hosts]
+        stats.host_index = host_index.reshape(-1).astype(np.intp)
+        stats.host_finding = np.array(host_finding, dtype=np.intp)
+        return stats
+
+    def risk_counts(self) -> np.ndarray:
+        return np.bincount(self.risk, minlength=len(self.risk_levels))
+
+    def heatmap(self) -> np.ndarray:
+        # rows are impact levels, columns are likelihood levels
+        columns = len(self.likelihood_levels)
+        cells = self.impact.astype(np.intp) * columns + self.likelihood
+        return np.bincount(cells, minlength=len(self.impact_levels) * columns).reshape(
+            len(self.impact_levels), columns
+        )
+
+    def cvss_distribution(self) -> np.ndarray:
+        scores = self.cvss_scores[~np.isnan(self.cvss_scores)]
+        return np.histogram(scores, bins=CVSS_BINS)[0]
+
+    def cvss_metric_counts(self, metric: str) -> np.ndarray:
+        codes = self.cvss_codes[:, CVSS_METRICS.index(metric)]
+        return np.bincount(
+            codes[codes >= 0], minlength=len(CVSS_SECTIONS[metric]["values"])
+        )
+
+    def host_totals(self) -> np.ndarray:
+        # hosts x risk levels; a finding counts once per scope entry on a host
+        totals = np.zeros((len(self.hosts), len(self.risk_levels)), dtype=np.int64)
+        np.add.at(totals, (self.host_index, self.risk[self.host_finding]), 1)
+        return totals
+
+    def risk_counts_latex(self) -> str:
+        counts = self.risk_counts()
+        latex = (
+            r"\begin{tabular}{lr}"
+            + "\n"
+            + r"\textbf{Risk} & \textbf{Findings} \\ \hline"
+            + "\n"
+        )
+        for level in reversed(range(len(self.risk_levels))):
+            latex += f"{self.risk_levels[level]} & {counts[level]} \\\\\n"
+        latex += r"\hline" + "\n" + f"Total & {counts.sum()} \\\\\n" + r"\end{tabular}"
+        return latex
+
+    def heatmap_latex(self) -> str:
+        matrix = self.heatmap()
+        columns = len(self.likelihood_levels)
+        latex = f"\\begin{{tabular}}{{l|{'c' * columns}}}\n"
+        latex += (
+            r"\textbf{Impact / Likelihood} & "
+            + " & ".join(self.likelihood_levels)
+            + r" \\ \hline"
+            + "\n"
+        )
+        for impact in reversed(range(len(self.impact_levels))):
+            cells = []
+            for likelihood in range(columns):
+                color = HEATMAP_COLORS[
+                    min((impact + likelihood + 1) // 2, len(HEATMAP_COLORS) - 1)
+                ]
+                cells.append(f"\\cellcolor{{{color}}}{matrix[impact, likelihood]}")
+            latex += f"{self.impact_levels[impact]} & " + " & ".join(cells) + " \\\\\n"
+        latex += r"\end{tabular}"
+        return latex
+
+    def cvss_distribution_latex(self) -> str:
+        counts = self.cvss_distribution()
+        latex = (
+            r"\begin{tabular}{lr}"
+            + "\n"
+            + r"\textbf{CVSS Severity} & \textbf{Findings} \\ \hline"
+            + "\n"
+        )
+        for label, count in reversed(list(zip(CVSS_BIN_LABELS, counts))):
+            latex += f"{label} & {count} \\\\\n"
+        unscored = int(np.isnan(self.cvss_scores).sum())
+        latex += f"Not Scored & {unscored} \\\\\n" + r"\end{tabular}"
+        return latex
+
+    def host_totals_latex(self, limit: int = 25) -> str:
+        totals = self.host_totals()
+        levels = list(reversed(range(len(self.risk_levels))))
+        # most severe hosts first: sort on the per-level counts, highest level first
+        order = np.lexsort([-totals[:, level] for level in reversed(levels)])[:limit]
+        latex = f"\\begin{{tabular}}{{l{'r' * (len(levels) + 1)}}}\n"
+        latex += (
+            r"\textbf{Host} & "
+            + " & ".join(f"\\textbf{{{self.risk_levels[level]}}}" for level in levels)
+            + r" & \textbf{Total} \\ \hline"
+            + "\n"
+        )
+        for host in order:
+            row = totals[host]
+            latex += (
+                escape_latex_special_chars(self.hosts[host])
+                + " & "
+                + " & ".join(str(row[level]) for level in levels)
+                + f" & {row.sum()} \\\\\n"
+            )
+        latex += r"\end{tabular}"
+        return latex
+
+    def to_latex(self) -> str:
+        return (
+            "\n\n".join(
+                [
+                    r"\subsubsection*{Findings by Risk}"
+                    + "\n"
+                    + self.risk_counts_latex(),
+                    r"\subsubsection*{Impact and Likelihood}"
+                    + "\n"
+                    + self.heatmap_latex(),
+                    r"\subsubsection*{CVSS 4.0 Scores}"
+                    + "\n"
+                    + self.cvss_distribution_latex(),
+                    r"\subsubsection*{Most Affected Hosts}"
+                    + "\n"
+                    + self.host_totals_latex(),
+                ]
+            )
+            + "\n"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate overview statistics tables from a folder of findings."
+    )
+    parser.add_argument(
+        "findings_folder", help="Path to folder containing JSON findings."
+    )
+    parser.add_argument(
+        "output_file",
+        nargs="?",
+        default=resolve_path("latex/sections/overview_stats.tex"),
+        help="Path to output LaTeX file.",
+    )
+    args = parser.parse_args()
+    parsed_findings: list[Finding] = []
+    for path in iter_finding_files(args.findings_folder):
+        try:
+            parsed_findings.append(load_finding_file(path))
+        except Exception as e:
+            print(f"Error loading finding from {path}: {e}")
+    latex_manager = LatexManager()
+    stats = RiskStats.build_from_findings(
+        parsed_findings,
+        latex_manager.risk_levels,
+        latex_manager.impact_levels,
+        latex_manager.likelihood_levels,
+    )
+    with open(args.output_file, "w") as file:
+        file.write(stats.to_latex())
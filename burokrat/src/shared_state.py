@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import yaml
+from util import *
+from latex_manager import LatexManager
+from findings_store import JsonFindingsStore, open_findings_store
+from findings_watcher import FindingsWatcher
+from host_index import HostIndex
+
+
+def serialize_finding(finding: Finding) -> str:
+    return json.dumps(finding.to_json(), sort_keys=True)
+
+
+class SharedState:
+    # Read-mostly state hosted once per server process and shared by every
+    # browser session: config, LatexManager (and with it the compiled-PDF
+    # cache and preamble format), the findings store and the last saved
+    # version of every finding, plus a host index over that saved version.
+    # Snapshot findings are never mutated; sessions edit deep copies and hand
+    # them back through save().
+    def __init__(self):
+        with open(resolve_path("config.yaml"), "r") as f:
+            self.yaml_config: dict = yaml.safe_load(f)
+        self.latex_manager = LatexManager()
+        self.findings_store = open_findings_store(self.yaml_config)
+        self._lock = threading.Lock()
+        # finding id -> last version read from or written to disk
+        self.snapshot: dict[str, Finding] = {}
+        self.saved_state: dict[str, str] = {}
+        # bumped whenever the snapshot changes so sessions know to resync
+        self.version = 0
+        for finding in self.findings_store.load_all():
+            self.snapshot[finding.id] = finding
+            self.saved_state[finding.id] = serialize_finding(finding)
+        self.host_index = HostIndex.build_from_findings(self.snapshot.values())
+        self.watcher: FindingsWatcher | None = None
+        if isinstance(self.findings_store, JsonFindingsStore):
+            self.watcher = FindingsWatcher(self.findings_store.folder)
+            self.watcher.start()
+
+    def findings(self) -> tuple[int, list[Finding]]:
+        with self._lock:
+            return self.version, sorted(self.snapshot.values(), key=lambda x: x.id)
+
+    def hosts(self) -> list[tuple[str, str]]:
+        # (host, label) pairs in address order
+        with self._lock:
+            return [
+                (host, self.host_index.host_label(host))
+                for host in self.host_index.sorted_hosts()
+            ]
+
+    def findings_on_host(self, host: str) -> set[str]:
+        with self._lock:
+            return self.host_index.findings_on_host(host)
+
+    def is_saved(self, finding: Finding, serialized: str | None = None) -> bool:
+        if serialized is None:
+            serialized = serialize_finding(finding)
+        return self.saved_state.get(finding.id) == serialized
+
+    def save(self, findings: list[Finding]) -> list[str]:
+        # write the findings that differ from the snapshot; the snapshot keeps
+        # a normalized copy so later edits in the session do not leak into it
+        dirty = {}
+        for finding in findings:
+            serialized = serialize_finding(finding)
+            if not self.is_saved(finding, serialized):
+                dirty[finding.id] = (finding, serialized)
+        if not dirty:
+            return []
+        with self._lock:
+            self.findings_store.save_many([finding for finding, _ in dirty.values()])
+            for finding_id, (_, serialized) in dirty.items():
+                self.snapshot[finding_id] = Finding.build_from_json(
+                    finding_id, json.loads(serialized)
+                )
+                self.saved_state[finding_id] = serialized
+                self.host_index.update(self.snapshot[finding_id])
+            self.version += 1
+        return list(dirty)
+
+    def apply_external_changes(self):
+        # merge files added, changed or deleted in vuln-data/ by other tools;
+        # our own writes match saved_state and are skipped
+        if self.watcher is None:
+            return
+        changed, deleted = self.watcher.drain()
+        if not changed and not deleted:
+            return
+        with self._lock:
+            updated = False
+            for path in changed:
+                try:
+                    finding = load_finding_file(path)
+                except Exception as e:
+                    print(f"Error loading finding from {path}: {e}")
+                    continue
+                serialized = serialize_finding(finding)
+                if self.saved_state.get(finding.id) == serialized:
+                    continue
+                self.snapshot[finding.id] = finding
+                self.saved_state[finding.id] = serialized
+                self.host_index.update(finding)
+                updated = True
+            for path in deleted:
+                finding_id = os.path.splitext(os.path.basename(path))[0]
+                if finding_id not in self.snapshot or os.path.exists(path):
+                    continue
+                del self.snapshot[finding_id]
+                del self.saved_state[finding_id]
+                self.host_index.remove(finding_id)
+                updated = True
+            if updated:
+                self.version += 1
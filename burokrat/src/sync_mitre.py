@@ -1,16 +1,68 @@
+import argparse
+import codecs
 import json
 import os
+import re
 import sys
+from typing import Iterable, Iterator
 import requests
 
 PRIMARY_URL = "https://raw.githubusercontent.com/mitre/cti/master/enterprise-attack/enterprise-attack.json"
 OUTFILE = "mitre_techniques.json"
+CHUNK_SIZE = 1 << 16
+OBJECTS_START = re.compile(r'"objects"\s*:\s*\[')
 
 
-def download_json(url: str, timeout: int = 30) -> dict:
-    resp = requests.get(url, timeout=timeout)
-    resp.raise_for_status()
-    return resp.json()
+def iter_text_chunks(source: str, timeout: int = 30) -> Iterator[str]:
+    # source is either a local bundle (for offline runs) or a URL to stream
+    if os.path.exists(source):
+        with open(source, "r", encoding="utf-8") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), ""):
+                yield chunk
+        return
+    with requests.get(source, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+
+def iter_stix_objects(chunks: Iterable[str]) -> Iterator[dict]:
+    # Incrementally decode the bundle's "objects" array one element at a time
+    # so only the current object and one chunk of text are held in memory.
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        match = OBJECTS_START.search(buffer)
+        if match:
+            buffer = buffer[match.end() :]
+            break
+        # keep a tail in case the key is split across chunks
+        buffer = buffer[-32:]
+    else:
+        # e.g. an HTML error page or a file that is not a STIX bundle
+        raise ValueError('no "objects" array found in the STIX bundle')
+    exhausted = False
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,")
+        if buffer.startswith("]"):
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                buffer += chunk
+            continue
+        yield obj
+        buffer = buffer[end:]
 
 
 def find_external_id_and_url(
@@ -39,9 +91,7 @@ def find_external_id_and_url(
     return tid, url
 
 
-def extract_techniques(stix_data: dict) -> list[dict[str, str]]:
-    out = []
-    objs = stix_data.get("objects", [])
+def iter_attack_patterns(objs: Iterable[dict]) -> Iterator[dict[str, str]]:
     for obj in objs:
         if obj.get("type") != "attack-pattern":
             continue
@@ -60,35 +110,44 @@ def extract_techniques(stix_data: dict) -> list[dict[str, str]]:
             continue
         if not ref_url:
             ref_url = f"https://attack.mitre.org/techniques/{tid}/"
-        out.append({"id": tid, "name": name or "", "url": ref_url})
-    seen = set()
-    unique = []
-    for item in out:
-        if item["id"] in seen:
-            continue
-        seen.add(item["id"])
-        unique.append(item)
+        yield {"id": tid, "name": name or "", "url": ref_url}
 
-    def sort_key(it):
-        return it["id"]
 
-    unique.sort(key=sort_key)
-    return unique
+def extract_techniques(stix_data: dict | Iterable[dict]) -> list[dict[str, str]]:
+    objs = stix_data.get("objects", []) if isinstance(stix_data, dict) else stix_data
+    unique: dict[str, dict[str, str]] = {}
+    for item in iter_attack_patterns(objs):
+        unique.setdefault(item["id"], item)
+    return [unique[tid] for tid in sorted(unique)]
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Extract MITRE ATT&CK techniques from the enterprise STIX bundle."
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default=PRIMARY_URL,
+        help="URL or local path of the STIX bundle.",
+    )
+    parser.add_argument("-o", "--output", default=OUTFILE, help="Output JSON file.")
+    args = parser.parse_args()
+    print(f"Streaming STIX JSON from: {args.source}")
     try:
-        print(f"Downloading STIX JSON from: {PRIMARY_URL}")
-        stix = download_json(PRIMARY_URL)
-        print("Downloaded successfully.")
+        techniques = extract_techniques(
+            iter_stix_objects(iter_text_chunks(args.source))
+        )
     except Exception as e:
-        print(f"Error downloading from primary URL: {e}")
+        print(f"Error reading STIX bundle: {e}")
         sys.exit(1)
-    print("Extracting techniques...")
-    techniques = extract_techniques(stix)
     print(f"Extracted {len(techniques)} techniques.")
-    out_path = os.path.abspath(OUTFILE)
-    with open(OUTFILE, "w", encoding="utf-8") as f:
+    if not techniques:
+        # an empty index would replace the existing one and break the GUI
+        print(f"Error: no techniques found, leaving {args.output} unchanged")
+        sys.exit(1)
+    out_path = os.path.abspath(args.output)
+    with open(args.output, "w", encoding="utf-8") as f:
         json.dump(techniques, f, indent=2)
     print(f"Wrote {len(techniques)} entries to {out_path}")
 
@@ -0,0 +1,256 @@
+import fcntl
+import os
+import re
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from build_cache import GENERATED_TEX_FILES, BuildCache
+from build_trace import span
+
+BUILD_ARTIFACT_EXTENSIONS = (
+    ".aux",
+    ".log",
+    ".pdf",
+    ".fls",
+    ".out",
+    ".fdb_latexmk",
+    ".synctex.gz",
+    ".toc",
+    ".lof",
+    ".lot",
+)
+STAMP_FILE = ".template-digest"
+LOCK_SUFFIX = ".lock"
+
+
+def is_build_output(path: str) -> bool:
+    # a PDF is only a build output next to the .tex it was built from, other
+    # PDFs are figures or included documents the template needs
+    if path.endswith(".pdf"):
+        return os.path.exists(path[: -len(".pdf")] + ".tex")
+    return path.endswith(BUILD_ARTIFACT_EXTENSIONS)
+
+
+class BuildWorkspace:
+    latex_dir: str
+    images_dir: str
+    root: str
+    tex_dir: str
+
+    def __init__(
+        self,
+        latex_dir: str,
+        images_dir: str,
+        exclude: list[str] | None = None,
+        root: str = "",
+    ):
+        # without a root the workspace is a fresh temporary directory
+        self.latex_dir = latex_dir
+        self.images_dir = images_dir
+        self.exclude = {os.path.abspath(x) for x in exclude or []}
+        self.root = root
+        self.tex_dir = os.path.join(root, "latex") if root else ""
+
+    def __enter__(self) -> "BuildWorkspace":
+        return self.create()
+
+    def __exit__(self, *exc):
+        self.remove()
+
+    def create(self) -> "BuildWorkspace":
+        # <root>/latex mirrors the template tree and <root>/images points at the
+        # shared images so \graphicspath{{../images/}} resolves unchanged
+        with span("workspace_setup"):
+            if self.root:
+                os.makedirs(self.root)
+            else:
+                self.root = tempfile.mkdtemp(prefix="burokrat-build-")
+            self.tex_dir = os.path.join(self.root, "latex")
+            self._link_tree(self.latex_dir, self.tex_dir)
+            self.link_generated()
+            if os.path.isdir(self.images_dir):
+                os.symlink(self.images_dir, os.path.join(self.root, "images"))
+        return self
+
+    def remove(self):
+        with span("cleanup"):
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def _link_tree(self, src_dir: str, dst_dir: str):
+        # directories are recreated so pdflatex writes the aux files of
+        # \include'd sections into the workspace instead of the shared tree
+        os.makedirs(dst_dir, exist_ok=True)
+        for entry in os.scandir(src_dir):
+            src = os.path.abspath(entry.path)
+            if src in self.exclude or is_build_output(entry.path):
+                continue
+            dst = os.path.join(dst_dir, entry.name)
+            if entry.is_dir():
+                self._link_tree(src, dst)
+            else:
+                os.symlink(src, dst)
+
+    def link_generated(self):
+        # linked even before they exist, since creating them doesn't change
+        # the template digest that a persistent workspace is recreated on
+        for filename in GENERATED_TEX_FILES:
+            dst = os.path.join(self.tex_dir, filename)
+            if not os.path.lexists(dst) and os.path.isdir(os.path.dirname(dst)):
+                os.symlink(os.path.abspath(os.path.join(self.latex_dir, filename)), dst)
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.tex_dir, filename)
+
+    def write(self, filename: str, content: str):
+        with open(self.path(filename), "w") as file:
+            file.write(content)
+
+    def clean(self):
+        # remove build outputs but keep the template mirror
+        with span("cleanup"):
+            for root, _, filenames in os.walk(self.tex_dir):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    if not os.path.islink(path) and is_build_output(path):
+                        os.remove(path)
+
+
+class WorkspaceCache:
+    # Keeps one BuildWorkspace per document (a finding id or report page) in
+    # cache_dir, so the aux, fdb_latexmk and log files of its last build are
+    # there for the next one and latexmk can skip passes. A workspace is only
+    # used by one build at a time, is recreated when the template tree
+    # changes, and the least recently used ones are removed once there are
+    # more than max_entries. The GUI, export_pdfs.py and report_builder.py
+    # share cache_dir, so a workspace is held with an flock on <root>.lock,
+    # which lives next to the workspace so recreating it keeps the lock and
+    # is removed with it when the workspace is evicted.
+    def __init__(
+        self,
+        cache_dir: str,
+        latex_dir: str,
+        images_dir: str,
+        exclude: list[str],
+        build_cache: BuildCache,
+        max_entries: int = 512,
+    ):
+        self.cache_dir = cache_dir
+        self.latex_dir = latex_dir
+        self.images_dir = images_dir
+        self.exclude = exclude
+        self.build_cache = build_cache
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+
+    def _root(self, key: str) -> str:
+        return os.path.join(self.cache_dir, re.sub(r"[^\w.-]", "_", key))
+
+    def _open_lock(self, root: str) -> int:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        return os.open(root + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+
+    @contextmanager
+    def checkout(self, key: str) -> Iterator[BuildWorkspace]:
+        root = self._root(key)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(root, threading.Lock())
+        # the thread lock queues builds of this process, the flock those of
+        # other processes
+        with key_lock:
+            lock_fd = self._lock_workspace(root)
+            try:
+                yield self._open(root)
+            finally:
+                os.close(lock_fd)
+        self.prune()
+
+    def _lock_workspace(self, root: str) -> int:
+        while True:
+            lock_fd = self._open_lock(root)
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(lock_fd).st_ino == os.stat(root + LOCK_SUFFIX).st_ino:
+                    return lock_fd
+            except FileNotFoundError:
+                pass
+            # the workspace was evicted while we waited, and its lock file
+            # removed, so lock the file a next checkout would create
+            os.close(lock_fd)
+
+    def _open(self, root: str) -> BuildWorkspace:
+        workspace = BuildWorkspace(
+            self.latex_dir, self.images_dir, exclude=self.exclude, root=root
+        )
+        # template files are symlinked, so edits show up on their own, but a
+        # file added to or removed from the template tree needs a new mirror
+        digest = self.build_cache.template_digest(self.latex_dir, self.exclude)
+        stamp_file = os.path.join(root, STAMP_FILE)
+        try:
+            with open(stamp_file, "r") as file:
+                stamp = file.read()
+        except FileNotFoundError:
+            stamp = ""
+        if stamp == digest:
+            # refresh mtime so pruning evicts the least recently used entries
+            os.utime(stamp_file)
+            workspace.link_generated()
+            return workspace
+        workspace.remove()
+        workspace.create()
+        with open(stamp_file, "w") as file:
+            file.write(digest)
+        return workspace
+
+    def prune(self):
+        try:
+            entries = [
+                entry.path
+                for entry in os.scandir(self.cache_dir)
+                if entry.is_dir(follow_symlinks=False)
+            ]
+        except FileNotFoundError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+
+        def last_used(path: str) -> float:
+            try:
+                return os.path.getmtime(os.path.join(path, STAMP_FILE))
+            except FileNotFoundError:
+                return 0.0
+
+        entries.sort(key=last_used, reverse=True)
+        for root in entries[self.max_entries :]:
+            lock_fd = self._open_lock(root)
+            try:
+                try:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # a build in this or another process is using it
+                    continue
+                with span("cleanup"):
+                    shutil.rmtree(root, ignore_errors=True)
+                    # removed while still held, so a build waiting on it
+                    # notices and locks a new file, see _lock_workspace()
+                    try:
+                        os.remove(root + LOCK_SUFFIX)
+                    except FileNotFoundError:
+                        pass
+            finally:
+                os.close(lock_fd)
+
+
+_workspace_cache: WorkspaceCache | None = None
+_workspace_cache_lock = threading.Lock()
+
+
+def get_workspace_cache(**kwargs) -> WorkspaceCache:
+    # one cache per process so its sessions share the per-workspace locks
+    global _workspace_cache
+    with _workspace_cache_lock:
+        if _workspace_cache is None:
+            _workspace_cache = WorkspaceCache(**kwargs)
+        return _workspace_cache
@@ -0,0 +1,169 @@
+import os
+import subprocess
+import threading
+from build_cache import BuildCache
+
+FORMAT_NAME = "preamble"
+
+
+class PreambleFormat:
+    latex_dir: str
+    format_dir: str
+    timeout: float | None
+
+    def __init__(
+        self,
+        latex_dir: str,
+        format_dir: str,
+        build_cache: BuildCache,
+        timeout: float | None = None,
+    ):
+        self.latex_dir = latex_dir
+        self.format_dir = format_dir
+        self.build_cache = build_cache
+        # the dump runs on the preview workers while holding _lock, so a hung
+        # pdflatex would otherwise block every other worker
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # don't retry a dump that already failed for the same templates
+        self._failed_digest = ""
+
+    @property
+    def format_file(self) -> str:
+        return os.path.join(self.format_dir, f"{FORMAT_NAME}.fmt")
+
+    @property
+    def stamp_file(self) -> str:
+        return os.path.join(self.format_dir, f"{FORMAT_NAME}.sha256")
+
+    def _read_stamp(self) -> tuple[str, list[str]]:
+        # the digest of the template files the preamble loaded, followed by
+        # their paths relative to latex_dir, one per line
+        try:
+            with open(self.stamp_file, "r") as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            return "", []
+        if not lines:
+            return "", []
+        latex_dir = os.path.abspath(self.latex_dir)
+        return lines[0], [os.path.join(latex_dir, x) for x in lines[1:] if x]
+
+    def _write_stamp(self, files: list[str]):
+        digest = self.build_cache.files_digest(self.latex_dir, files)
+        with open(self.stamp_file, "w") as file:
+            file.write(digest + "\n")
+            for path in files:
+                file.write(os.path.relpath(path, self.latex_dir) + "\n")
+
+    def _is_current(self) -> bool:
+        digest, files = self._read_stamp()
+        if not digest or not os.path.exists(self.format_file):
+            return False
+        try:
+            return self.build_cache.files_digest(self.latex_dir, files) == digest
+        except FileNotFoundError:
+            return False
+
+    def ensure(self, report_tex_file: str, exclude: list[str] | None = None) -> bool:
+        # dump the shared preamble (everything before \begin{document}) with
+        # mylatexformat; only rebuilt when one of the template files it loaded
+        # changes, so editing the report sections keeps the format
+        if self._is_current():
+            return True
+        digest = self.build_cache.template_digest(self.latex_dir, exclude)
+        if self._failed_digest == digest:
+            return False
+        with self._lock:
+            if self._is_current():
+                return True
+            os.makedirs(self.format_dir, exist_ok=True)
+            jobname = f"{FORMAT_NAME}-{os.getpid()}-{threading.get_ident()}"
+            command = [
+                "pdflatex",
+                "-ini",
+                "-interaction=nonstopmode",
+                "-halt-on-error",
+                "-recorder",
+                f"-jobname={jobname}",
+                f"-output-directory={self.format_dir}",
+                "&pdflatex",
+                "mylatexformat.ltx",
+                report_tex_file,
+            ]
+            print(f"Running command: {' '.join(command)}")
+            try:
+                result = subprocess.run(
+                    command,
+                    cwd=self.latex_dir,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    timeout=self.timeout,
+                )
+            except subprocess.TimeoutExpired:
+                print(
+                    f"Warning: dumping the preamble format timed out after "
+                    f"{self.timeout}s"
+                )
+                self._failed_digest = digest
+                self._remove_job_files(jobname)
+                return False
+            except OSError as e:
+                print(f"Warning: failed to dump preamble format: {e}")
+                self._failed_digest = digest
+                return False
+            built_file = os.path.join(self.format_dir, f"{jobname}.fmt")
+            if result.returncode != 0 or not os.path.exists(built_file):
+                print(f"Warning: failed to dump preamble format:\n{result.stdout}")
+                self._failed_digest = digest
+                return False
+            os.replace(built_file, self.format_file)
+            # without a recorder file every template file counts, as if the
+            # preamble had loaded them all
+            files = self._recorded_files(jobname, exclude)
+            if not files:
+                files = self.build_cache.template_files(self.latex_dir, exclude)
+            self._remove_job_files(jobname)
+            self._write_stamp(files)
+        return True
+
+    def _recorded_files(
+        self, jobname: str, exclude: list[str] | None = None
+    ) -> list[str]:
+        # the template files among the INPUT lines pdflatex -recorder wrote;
+        # files of the TeX distribution don't change between builds
+        latex_dir = os.path.abspath(self.latex_dir)
+        excluded = {os.path.abspath(x) for x in exclude or []}
+        try:
+            with open(os.path.join(self.format_dir, f"{jobname}.fls"), "r") as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            return []
+        files = set()
+        for line in lines:
+            if not line.startswith("INPUT "):
+                continue
+            path = os.path.abspath(os.path.join(latex_dir, line[len("INPUT ") :]))
+            if os.path.commonpath([path, latex_dir]) != latex_dir:
+                continue
+            if path not in excluded and os.path.isfile(path):
+                files.add(path)
+        return sorted(files)
+
+    def _remove_job_files(self, jobname: str):
+        for ext in (".fmt", ".log", ".aux", ".fls"):
+            try:
+                os.remove(os.path.join(self.format_dir, jobname + ext))
+            except FileNotFoundError:
+                pass
+
+    def env(self) -> dict[str, str]:
+        # let kpathsea find the dumped format by name from any working directory
+        env = dict(os.environ)
+        env["TEXFORMATS"] = self.format_dir + os.pathsep + env.get("TEXFORMATS", "")
+        return env
+
+    def pdflatex_command(self) -> str:
+        return f"pdflatex -fmt={FORMAT_NAME} %O %S"
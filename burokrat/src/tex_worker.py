@@ -0,0 +1,235 @@
+import hashlib
+import os
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from build_cache import BuildCache, copy_file_atomic
+from build_trace import BuildTrace, BuildTracer, activate, span
+from tex_build import BuildWorkspace, WorkspaceCache
+from tex_format import FORMAT_NAME, PreambleFormat
+from evidence_images import EvidenceImages
+
+# files whose change between two passes means pdflatex has to run again
+RERUN_EXTENSIONS = (".aux", ".toc", ".out", ".lof", ".lot")
+
+
+def rerun_digest(tex_dir: str) -> str:
+    digest = hashlib.sha256()
+    for root, _, filenames in os.walk(tex_dir):
+        for filename in sorted(filenames):
+            if not filename.endswith(RERUN_EXTENSIONS):
+                continue
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, tex_dir).encode("utf-8"))
+            with open(path, "rb") as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+
+class TexJob:
+    def __init__(
+        self,
+        key: str,
+        tex_file: str,
+        files: dict[str, str],
+        output_file: str,
+        cache_key: str,
+        trace: BuildTrace,
+    ):
+        self.key = key
+        self.tex_file = tex_file
+        self.files = files
+        self.output_file = output_file
+        self.cache_key = cache_key
+        self.trace = trace
+        self.future: Future[tuple[bool, str]] = Future()
+
+
+class TexWorker:
+    # A long-lived build thread. Each job is built in the workspace kept for
+    # its finding, so the aux files of that finding's last build are still
+    # there, and pdflatex is run directly on the dumped preamble format rather
+    # than through latexmk. A pass is only repeated while it changes the aux
+    # files, so an edit that moves no labels is rebuilt in a single pass.
+    def __init__(self, pool: "TexWorkerPool", index: int):
+        self.pool = pool
+        self.name = f"tex-worker-{index}"
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                job = self.pool.jobs.get(timeout=1)
+            except queue.Empty:
+                continue
+            # skip builds that were superseded while queued
+            if not job.future.set_running_or_notify_cancel():
+                self.pool.tracer.finish(job.trace, "cancelled")
+                continue
+            with activate(job.trace):
+                try:
+                    success, error = self._build(job)
+                except Exception as e:
+                    self.pool.tracer.finish(job.trace, "failed", str(e))
+                    job.future.set_exception(e)
+                    continue
+            self.pool.tracer.finish(job.trace, "ok" if success else "failed", error)
+            job.future.set_result((success, error))
+
+    def _build(self, job: TexJob) -> tuple[bool, str]:
+        with self.pool.workspaces.checkout(job.key) as workspace:
+            for filename, content in job.files.items():
+                workspace.write(filename, content)
+            self.pool.evidence_images.prepare(workspace.root, job.files.values())
+            with span("format"):
+                use_format = self.pool.preamble_format.ensure(
+                    self.pool.report_tex_file, exclude=self.pool.workspaces.exclude
+                )
+            command = ["pdflatex", "-interaction=nonstopmode", "-halt-on-error"]
+            if use_format:
+                command.append(f"-fmt={FORMAT_NAME}")
+            command.append(job.tex_file)
+            with span("pdflatex"):
+                success, error = self._run_passes(workspace, command, job.trace)
+            if not success:
+                # a killed or failed pdflatex may leave any file half-written
+                # (a truncated aux file would break the next build too), so
+                # the workspace is dropped and recreated on the next checkout
+                workspace.remove()
+                return False, error
+            generated_pdf = workspace.path(os.path.splitext(job.tex_file)[0] + ".pdf")
+            if job.cache_key:
+                with span("cache_store"):
+                    self.pool.build_cache.put(job.cache_key, generated_pdf)
+            with span("copy_output"):
+                copy_file_atomic(generated_pdf, job.output_file)
+        return True, ""
+
+    def _run_passes(
+        self, workspace: BuildWorkspace, command: list[str], trace: BuildTrace
+    ) -> tuple[bool, str]:
+        before = rerun_digest(workspace.tex_dir)
+        for run in range(1, self.pool.max_passes + 1):
+            start = time.perf_counter()
+            try:
+                result = subprocess.run(
+                    command,
+                    cwd=workspace.tex_dir,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    errors="replace",
+                    env=self.pool.preamble_format.env(),
+                    timeout=self.pool.timeout,
+                )
+            except subprocess.TimeoutExpired:
+                # subprocess.run has already killed the hung pdflatex
+                return False, f"pdflatex timed out after {self.pool.timeout}s"
+            except OSError as e:
+                return False, f"Failed to run pdflatex: {e}"
+            finally:
+                trace.passes.append(
+                    {
+                        "rule": "pdflatex",
+                        "run": run,
+                        "seconds": round(time.perf_counter() - start, 6),
+                    }
+                )
+            if result.returncode != 0:
+                return False, result.stdout.strip()
+            after = rerun_digest(workspace.tex_dir)
+            if after == before:
+                break
+            before = after
+        return True, ""
+
+
+class TexWorkerPool:
+    # Fixed set of TexWorkers fed from one queue, shared by every session of
+    # the server process. restart() replaces the workers.
+    def __init__(
+        self,
+        workspaces: WorkspaceCache,
+        evidence_images: EvidenceImages,
+        report_tex_file: str,
+        build_cache: BuildCache,
+        preamble_format: PreambleFormat,
+        tracer: BuildTracer,
+        workers: int = 2,
+        timeout: float = 60,
+        max_passes: int = 4,
+    ):
+        self.workspaces = workspaces
+        self.evidence_images = evidence_images
+        self.report_tex_file = report_tex_file
+        self.build_cache = build_cache
+        self.preamble_format = preamble_format
+        self.tracer = tracer
+        self.size = workers
+        self.timeout = timeout
+        self.max_passes = max_passes
+        self.jobs: queue.Queue[TexJob] = queue.Queue()
+        self.workers: list[TexWorker] = []
+        self._lock = threading.Lock()
+        self.stopped = False
+        self._start_workers()
+
+    def _start_workers(self):
+        self.workers = [TexWorker(self, i) for i in range(self.size)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(
+        self,
+        key: str,
+        tex_file: str,
+        files: dict[str, str],
+        output_file: str,
+        cache_key: str,
+        trace: BuildTrace,
+    ) -> Future[tuple[bool, str]]:
+        job = TexJob(key, tex_file, files, output_file, cache_key, trace)
+        # a worker thread only dies on an error outside a build (e.g. while
+        # writing the trace); replace the set so queued jobs still run
+        if any(not worker.thread.is_alive() for worker in self.workers):
+            self.restart()
+        self.jobs.put(job)
+        return job.future
+
+    def restart(self):
+        # queued jobs are kept; each old worker exits after its current build
+        with self._lock:
+            if self.stopped:
+                return
+            for worker in self.workers:
+                worker.stopped.set()
+            self._start_workers()
+
+    def stop(self):
+        with self._lock:
+            for worker in self.workers:
+                worker.stopped.set()
+            for worker in self.workers:
+                worker.thread.join()
+            self.workers = []
+            self.stopped = True
+
+
+_worker_pool: TexWorkerPool | None = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_tex_worker_pool(**kwargs) -> TexWorkerPool:
+    # one pool per server process so concurrent sessions share the same bound
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = TexWorkerPool(**kwargs)
+        return _worker_pool
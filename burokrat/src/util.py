@@ -1,15 +1,32 @@
+from array import array
 from dataclasses import dataclass
+from typing import Iterator
+import json
 import os
+import sys
 
 
 def resolve_path(path: str) -> str:
     return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", path))
 
 
+def write_json_atomic(path: str, data: dict):
+    # write to a sibling temp file and rename so readers never see partial json
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
 class MachineScope:
+    # slotted; services are (name, port) tuples and the strings are interned
+    # since the same hosts and ports repeat across many findings
+    __slots__ = ("ip", "name", "services")
     ip: str
     name: str
-    services: list[dict[str, str]]
+    services: list[tuple[str, str]]
 
     def __init__(self, ip: str = "", name: str = ""):
         self.ip = ip
@@ -21,16 +38,24 @@ class MachineScope:
             "ip": self.ip.strip(),
             "name": self.name.strip(),
             "services": [
-                {"name": svc["name"].strip(), "port": svc["port"].strip()}
-                for svc in self.services
-                if svc["name"].strip() and svc["port"].strip()
+                {"name": name.strip(), "port": port.strip()}
+                for name, port in self.services
+                if name.strip() and port.strip()
             ],
         }
 
+    @staticmethod
+    def _intern(value) -> str:
+        # scanner imports may store ports (or IPs) as numbers
+        return sys.intern("" if value is None else str(value))
+
     def from_json(self, data: dict):
-        self.ip = data.get("ip", "")
-        self.name = data.get("name", "")
-        self.services = data.get("services", [])
+        self.ip = self._intern(data.get("ip", ""))
+        self.name = self._intern(data.get("name", ""))
+        self.services = [
+            (self._intern(svc.get("name", "")), self._intern(svc.get("port", "")))
+            for svc in data.get("services", [])
+        ]
 
     @staticmethod
     def build_from_json(data: dict) -> "MachineScope":
@@ -39,14 +64,14 @@ class MachineScope:
         return instance
 
 
-@dataclass
+@dataclass(slots=True)
 class Finding:
     id: str
     title: str
     risk: int
     impact: int
     likelihood: int
-    cvss_vector: dict[str, str]
+    cvss_vector: "CvssVector"
     scope: list[MachineScope]
     description: str
     business_impact: str
@@ -62,19 +87,7 @@ class Finding:
         self.risk = 0
         self.impact = 0
         self.likelihood = 0
-        self.cvss_vector = {
-            "AV": "",
-            "AC": "",
-            "AT": "",
-            "PR": "",
-            "UI": "",
-            "VC": "",
-            "VI": "",
-            "VA": "",
-            "SC": "",
-            "SI": "",
-            "SA": "",
-        }
+        self.cvss_vector = CvssVector()
         self.scope = []
         self.description = ""
         self.business_impact = ""
@@ -90,7 +103,7 @@ class Finding:
             "risk": self.risk + 1,
             "impact": self.impact + 1,
             "likelihood": self.likelihood + 1,
-            "cvss_vector": self.cvss_vector,
+            "cvss_vector": self.cvss_vector.to_json(),
             "scope": [x.to_json() for x in self.scope],
             "description": self.description.strip(),
             "business_impact": self.business_impact.strip(),
@@ -105,7 +118,7 @@ class Finding:
         self.risk = min(data.get("risk", 1) - 1, 3)
         self.impact = min(data.get("impact", 1) - 1, 3)
         self.likelihood = min(data.get("likelihood", 1) - 1, 3)
-        self.cvss_vector = data.get("cvss_vector", self.cvss_vector)
+        self.cvss_vector = CvssVector.build_from_json(data.get("cvss_vector", {}))
         self.scope = [
             MachineScope.build_from_json(svc) for svc in data.get("scope", [])
         ]
@@ -124,6 +137,18 @@ class Finding:
         return instance
 
 
+def iter_finding_files(findings_folder: str) -> Iterator[str]:
+    for filename in sorted(os.listdir(findings_folder)):
+        if filename.endswith(".json"):
+            yield os.path.abspath(os.path.join(findings_folder, filename))
+
+
+def load_finding_file(path: str) -> Finding:
+    with open(path, "r") as f:
+        data = json.load(f)
+    return Finding.build_from_json(os.path.splitext(os.path.basename(path))[0], data)
+
+
 CVSS_SECTIONS = {
     "AV": {
         "name": "Attack Vector",
@@ -214,3 +239,75 @@ CVSS_SECTIONS = {
         },
     },
 }
+
+
+CVSS_METRIC_VALUES = [list(details["values"]) for details in CVSS_SECTIONS.values()]
+CVSS_METRIC_INDEX = {metric: i for i, metric in enumerate(CVSS_SECTIONS)}
+CVSS_VALUE_CODES = [
+    {value: code for code, value in enumerate(values)} for values in CVSS_METRIC_VALUES
+]
+
+
+class CvssVector:
+    # CVSS 4.0 base metrics as one signed byte per metric: the index of the
+    # value in CVSS_SECTIONS, or -1 while unset. Behaves like the old
+    # metric -> value dict ("" for unset) so callers can keep indexing it.
+    __slots__ = ("codes",)
+    codes: array
+
+    def __init__(self):
+        self.codes = array("b", [-1] * len(CVSS_SECTIONS))
+
+    def __getitem__(self, metric: str) -> str:
+        code = self.codes[CVSS_METRIC_INDEX[metric]]
+        return CVSS_METRIC_VALUES[CVSS_METRIC_INDEX[metric]][code] if code >= 0 else ""
+
+    def __setitem__(self, metric: str, value: str | None):
+        i = CVSS_METRIC_INDEX[metric]
+        # unknown values are dropped, the editor could not select them anyway
+        self.codes[i] = CVSS_VALUE_CODES[i].get(value or "", -1)
+
+    def get(self, metric: str, default: str | None = None) -> str | None:
+        return self[metric] if metric in CVSS_METRIC_INDEX else default
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(CVSS_SECTIONS)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CvssVector):
+            return self.codes == other.codes
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CvssVector({self.to_json()})"
+
+    def __deepcopy__(self, memo) -> "CvssVector":
+        instance = CvssVector()
+        instance.codes = array("b", self.codes)
+        return instance
+
+    def keys(self) -> Iterator[str]:
+        return iter(CVSS_SECTIONS)
+
+    def values(self) -> list[str]:
+        return [self[metric] for metric in CVSS_SECTIONS]
+
+    def items(self) -> list[tuple[str, str]]:
+        return [(metric, self[metric]) for metric in CVSS_SECTIONS]
+
+    def to_json(self) -> dict[str, str]:
+        return dict(self.items())
+
+    def from_json(self, data: dict[str, str]):
+        for metric, value in data.items():
+            if metric in CVSS_METRIC_INDEX:
+                self[metric] = value
+
+    @staticmethod
+    def build_from_json(data: dict[str, str]) -> "CvssVector":
+        instance = CvssVector()
+        instance.from_json(data)
+        return instance